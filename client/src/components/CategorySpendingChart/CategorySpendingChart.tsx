@@ -23,7 +23,7 @@ const COLORS = [
 ];
 
 export const CategorySpendingChart: React.FC<InsightViewProps> = ({
-  transactions,
+  monthlyTotals,
   isLoading,
   error,
   ignoreReimbursed,
@@ -34,18 +34,18 @@ export const CategorySpendingChart: React.FC<InsightViewProps> = ({
   // Totals are derived from data the panel already fetched, so switching
   // tabs or toggling the filter re-renders without another round trip.
   const categoryTotals = useMemo<CategoryTotal[]>(() => {
-    const expenses = transactions.filter(
-      (t) => t.cad_amount < 0 && !(ignoreReimbursed && t.is_reimbursed)
+    const expenses = monthlyTotals.filter(
+      (entry) => entry.total < 0 && !(ignoreReimbursed && entry.is_reimbursed)
     );
 
     const categoryMap = new Map<string, { category: CategoryTotal['category']; total: number }>();
-    expenses.forEach((transaction) => {
-      const category = transaction.category;
+    expenses.forEach((entry) => {
+      const category = entry.category;
       const existing = categoryMap.get(category.value);
       if (existing) {
-        existing.total += Math.abs(transaction.cad_amount);
+        existing.total += Math.abs(entry.total);
       } else {
-        categoryMap.set(category.value, { category, total: Math.abs(transaction.cad_amount) });
+        categoryMap.set(category.value, { category, total: Math.abs(entry.total) });
       }
     });
 
@@ -64,11 +64,14 @@ export const CategorySpendingChart: React.FC<InsightViewProps> = ({
         ...entry,
         color: COLORS[index % COLORS.length],
       }));
-  }, [transactions, ignoreReimbursed]);
+  }, [monthlyTotals, ignoreReimbursed]);
 
   const reimbursedCount = useMemo(
-    () => transactions.filter((t) => t.cad_amount < 0 && t.is_reimbursed).length,
-    [transactions]
+    () =>
+      monthlyTotals
+        .filter((entry) => entry.total < 0 && entry.is_reimbursed)
+        .reduce((count, entry) => count + entry.transaction_count, 0),
+    [monthlyTotals]
   );
 
   const handleCategoryClick = (category: string) => {
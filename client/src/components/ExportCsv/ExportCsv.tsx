@@ -11,6 +11,8 @@ export interface ExportFilters {
   endDate: string;
   sortBy: string;
   sortOrder: SortOrder;
+  /** Free-text search over the descriptions; empty for none. */
+  search: string;
 }
 
 interface ExportCsvProps {
@@ -48,6 +50,7 @@ export const ExportCsv: React.FC<ExportCsvProps> = ({ filters, totalItems }) =>
       if (filters.category) params.set('category', filters.category);
       if (filters.startDate) params.set('start_date', filters.startDate);
       if (filters.endDate) params.set('end_date', filters.endDate);
+      if (filters.search) params.set('q', filters.search);
 
       const response = await fetch(
         `${API_BASE_URL}/export-csv?${params.toString()}`
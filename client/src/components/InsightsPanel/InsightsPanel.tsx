@@ -1,6 +1,6 @@
 import React, { useMemo, useRef, useState } from 'react';
 import { Category } from '../TransactionViewer/types';
-import { useTransactions } from '../../hooks/useTransactions';
+import { useMonthlyInsights } from '../../hooks/useMonthlyInsights';
 import { INSIGHT_VIEWS, DEFAULT_VIEW_ID } from './views';
 
 interface InsightsPanelProps {
@@ -24,7 +24,7 @@ export const InsightsPanel: React.FC<InsightsPanelProps> = ({
   const [ignoreReimbursed, setIgnoreReimbursed] = useState(false);
   const tabRefs = useRef<Record<string, HTMLButtonElement | null>>({});
 
-  const { transactions, isLoading, error } = useTransactions(
+  const { monthlyTotals, isLoading, error } = useMonthlyInsights(
     startDate,
     endDate,
     reloadKey
@@ -35,8 +35,11 @@ export const InsightsPanel: React.FC<InsightsPanelProps> = ({
     INSIGHT_VIEWS.find((view: any) => view.id === activeViewId) ?? INSIGHT_VIEWS[0];
 
   const reimbursedCount = useMemo(
-    () => transactions.filter((t) => t.cad_amount < 0 && t.is_reimbursed).length,
-    [transactions]
+    () =>
+      monthlyTotals
+        .filter((entry) => entry.total < 0 && entry.is_reimbursed)
+        .reduce((count, entry) => count + entry.transaction_count, 0),
+    [monthlyTotals]
   );
 
   // Arrow keys move between tabs, which is what a tablist is expected to do
@@ -112,7 +115,7 @@ export const InsightsPanel: React.FC<InsightsPanelProps> = ({
           aria-labelledby={`insight-tab-${activeView.id}`}
         >
           <ActiveComponent
-            transactions={transactions}
+            monthlyTotals={monthlyTotals}
             isLoading={isLoading}
             error={error}
             ignoreReimbursed={ignoreReimbursed}
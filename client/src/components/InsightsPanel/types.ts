@@ -1,5 +1,16 @@
 import React from 'react';
-import { Category, Transaction } from '../TransactionViewer/types';
+import { Category } from '../TransactionViewer/types';
+
+/** One row of /insights/monthly: a month × category × reimbursed bucket. */
+export interface MonthlyCategoryTotal {
+  /** YYYY-MM */
+  month: string;
+  category: { value: string; description: string };
+  is_reimbursed: boolean;
+  transaction_count: number;
+  /** Signed sum, so debits come back negative */
+  total: number;
+}
 
 /**
  * Every view in the panel receives the same props, so adding a view means
@@ -7,7 +18,7 @@ import { Category, Transaction } from '../TransactionViewer/types';
  * to the panel itself.
  */
 export interface InsightViewProps {
-  transactions: Transaction[];
+  monthlyTotals: MonthlyCategoryTotal[];
   isLoading: boolean;
   error: string | null;
   /** Whether reimbursed transactions should be excluded from totals. */
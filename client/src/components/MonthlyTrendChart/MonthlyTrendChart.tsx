@@ -14,7 +14,7 @@ const COMPACT_THRESHOLD = 6;
 const COMPACT_ROW_HEIGHT = 24;
 
 export const MonthlyTrendChart: React.FC<InsightViewProps> = ({
-  transactions,
+  monthlyTotals,
   isLoading,
   error,
   ignoreReimbursed,
@@ -22,8 +22,8 @@ export const MonthlyTrendChart: React.FC<InsightViewProps> = ({
   const [hoveredKey, setHoveredKey] = useState<string | null>(null);
 
   const buckets = useMemo(
-    () => buildMonthlySeries(transactions, ignoreReimbursed),
-    [transactions, ignoreReimbursed]
+    () => buildMonthlySeries(monthlyTotals, ignoreReimbursed),
+    [monthlyTotals, ignoreReimbursed]
   );
 
   const summary = useMemo(() => summarizeMonthly(buckets), [buckets]);
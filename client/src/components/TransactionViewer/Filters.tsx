@@ -8,6 +8,8 @@ export const Filters: React.FC<FilterProps> = ({
   categories,
   selectedCategory,
   onCategoryChange,
+  search,
+  onSearchChange,
   pageSize,
   onPageSizeChange,
   startDate,
@@ -43,6 +45,20 @@ export const Filters: React.FC<FilterProps> = ({
         </div>
       </div>
 
+      {/* Description Search */}
+      <div>
+        <label className="block text-sm font-medium text-gray-700 mb-2">
+          Search Descriptions
+        </label>
+        <input
+          type="search"
+          value={search}
+          onChange={onSearchChange}
+          placeholder="e.g. tim hortons"
+          className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent"
+        />
+      </div>
+
       {/* Date Range Row */}
       <DateRangeFilter
         preset={datePreset}
@@ -10,6 +10,8 @@ import {
   resolvePreset,
 } from '../../utils/dateRanges';
 
+const SEARCH_DEBOUNCE_MS = 300;
+
 interface TransactionViewerProps {
   onDateRangeChange?: (range: { startDate?: string; endDate?: string }) => void;
   selectedCategory?: string;
@@ -46,6 +48,17 @@ export default function TransactionViewer({
   );
   const [sortBy, setSortBy] = useState<string>('date');
   const [sortOrder, setSortOrder] = useState<SortOrder>(SortOrder.Descending);
+  // What's typed, and what's actually been searched for once typing pauses
+  const [search, setSearch] = useState<string>('');
+  const [query, setQuery] = useState<string>('');
+
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      setQuery(search.trim());
+      setCurrentPage(1);
+    }, SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [search]);
 
   useEffect(() => {
     if (externalSelectedCategory && externalSelectedCategory !== selectedCategory) {
@@ -60,7 +73,7 @@ export default function TransactionViewer({
 
   useEffect(() => {
     fetchTransactions();
-  }, [transactionType, selectedCategory, currentPage, pageSize, startDate, endDate, sortBy, sortOrder, reloadKey]);
+  }, [transactionType, selectedCategory, currentPage, pageSize, startDate, endDate, sortBy, sortOrder, query, reloadKey]);
 
   useEffect(() => {
     if (onDateRangeChange) {
@@ -102,6 +115,7 @@ export default function TransactionViewer({
       let url = `${API_BASE_URL}/transactions?transaction_type=${encodeURIComponent(transactionType)}&category=${encodeURIComponent(selectedCategory)}&page=${currentPage}&page_size=${pageSize}&sort_by=${sortBy}&sort_order=${sortOrder}`;
       if (startDate) url += `&start_date=${startDate}`;
       if (endDate) url += `&end_date=${endDate}`;
+      if (query) url += `&q=${encodeURIComponent(query)}`;
 
       const response = await fetch(url);
       if (!response.ok) throw new Error('Failed to fetch transactions');
@@ -193,6 +207,7 @@ export default function TransactionViewer({
             endDate,
             sortBy,
             sortOrder,
+            search: query,
           }}
           totalItems={metadata?.total_items}
         />
@@ -201,6 +216,8 @@ export default function TransactionViewer({
           categories={categories}
           selectedCategory={selectedCategory}
           onCategoryChange={handleCategoryChange}
+          search={search}
+          onSearchChange={(e) => setSearch(e.target.value)}
           pageSize={pageSize}
           onPageSizeChange={handlePageSizeChange}
           startDate={startDate}
@@ -40,6 +40,8 @@ export interface FilterProps {
   categories: Category[];
   selectedCategory: string;
   onCategoryChange: (e: React.ChangeEvent<HTMLSelectElement>) => void;
+  search: string;
+  onSearchChange: (e: React.ChangeEvent<HTMLInputElement>) => void;
   pageSize: number;
   onPageSizeChange: (e: React.ChangeEvent<HTMLSelectElement>) => void;
   startDate: string;
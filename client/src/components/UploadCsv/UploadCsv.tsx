@@ -8,10 +8,25 @@ interface UploadCsvProps {
 }
 
 interface Status {
-  type: 'success' | 'error';
+  type: 'success' | 'error' | 'progress';
   message: string;
 }
 
+/** Shape of `/jobs/{job_id}`; `message` is only set once the import succeeds. */
+interface ImportJob {
+  job_id: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  filename: string | null;
+  rows_processed: number;
+  rows_per_second: number | null;
+  error: string | null;
+  message?: string;
+}
+
+const POLL_INTERVAL_MS = 1000;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
 /** FastAPI returns `detail` as a string for HTTPException, but as an array of
  *  error objects for request-validation failures. Normalize both. */
 const readDetail = (payload: unknown, fallback: string): string => {
@@ -68,9 +83,35 @@ export const UploadCsv: React.FC<UploadCsvProps> = ({ onUploaded }) => {
         throw new Error(readDetail(payload, `Upload failed (${response.status})`));
       }
 
+      // The server queues the load and answers straight away; poll the job
+      // so a large file can't time out the upload request itself
+      let job: ImportJob = payload;
+      while (job.status === 'queued' || job.status === 'running') {
+        setStatus({
+          type: 'progress',
+          message:
+            job.status === 'queued'
+              ? `Uploaded ${file.name} — waiting to import…`
+              : `Importing ${file.name} — ${job.rows_processed.toLocaleString()} rows so far…`,
+        });
+
+        await sleep(POLL_INTERVAL_MS);
+
+        const jobResponse = await fetch(`${API_BASE_URL}/jobs/${job.job_id}`);
+        const jobPayload = await jobResponse.json().catch(() => null);
+        if (!jobResponse.ok) {
+          throw new Error(readDetail(jobPayload, `Could not check import (${jobResponse.status})`));
+        }
+        job = jobPayload;
+      }
+
+      if (job.status === 'failed') {
+        throw new Error(job.error ?? 'Import failed');
+      }
+
       setStatus({
         type: 'success',
-        message: `Uploaded ${payload.filename} — ${payload.rows} transactions loaded`,
+        message: `Uploaded ${job.filename} — ${job.message}`,
       });
 
       onUploaded?.();
@@ -104,13 +145,19 @@ export const UploadCsv: React.FC<UploadCsvProps> = ({ onUploaded }) => {
         className="inline-flex items-center gap-2 self-start rounded-lg bg-blue-600 px-4 py-2 text-sm font-medium text-white transition-colors hover:bg-blue-700 focus:outline-none focus-visible:ring-2 focus-visible:ring-blue-500 focus-visible:ring-offset-2 disabled:cursor-not-allowed disabled:opacity-60 sm:self-auto"
       >
         <Upload size={16} aria-hidden="true" />
-        {uploading ? 'Uploading…' : 'Upload CSV'}
+        {uploading ? 'Importing…' : 'Upload CSV'}
       </button>
 
       {status && (
         <p
           role={status.type === 'error' ? 'alert' : 'status'}
-          className={`text-sm ${status.type === 'error' ? 'text-red-600' : 'text-green-600'}`}
+          className={`text-sm ${
+            status.type === 'error'
+              ? 'text-red-600'
+              : status.type === 'progress'
+                ? 'text-gray-600'
+                : 'text-green-600'
+          }`}
         >
           {status.message}
         </p>
@@ -1,62 +1,63 @@
 import { useEffect, useState } from 'react';
-import { Transaction } from '../components/TransactionViewer/types';
+import { MonthlyCategoryTotal } from '../components/InsightsPanel/types';
 import { API_BASE_URL } from '../utils/constants';
 
-interface UseTransactionsResult {
-  transactions: Transaction[];
+interface UseMonthlyInsightsResult {
+  monthlyTotals: MonthlyCategoryTotal[];
   isLoading: boolean;
   error: string | null;
 }
 
 /**
- * Fetches the transactions backing the insight panel.
+ * Fetches the per-month, per-category totals backing the insight panel.
  *
  * Lives above the individual views so switching tabs re-renders from data
- * already in memory instead of firing another request per view.
+ * already in memory instead of firing another request per view. The server
+ * does the bucketing, so the payload stays small however long the history is.
  */
-export const useTransactions = (
+export const useMonthlyInsights = (
   startDate?: string,
   endDate?: string,
   reloadKey = 0
-): UseTransactionsResult => {
-  const [transactions, setTransactions] = useState<Transaction[]>([]);
+): UseMonthlyInsightsResult => {
+  const [monthlyTotals, setMonthlyTotals] = useState<MonthlyCategoryTotal[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
     const controller = new AbortController();
 
-    const fetchTransactions = async () => {
+    const fetchMonthlyTotals = async () => {
       setIsLoading(true);
       setError(null);
 
       try {
-        let url = `${API_BASE_URL}/transactions?category=All&transaction_type=debit&page=1&page_size=10000000`;
+        let url = `${API_BASE_URL}/insights/monthly?category=All&transaction_type=debit`;
         if (startDate) url += `&start_date=${startDate}`;
         if (endDate) url += `&end_date=${endDate}`;
 
         const response = await fetch(url, { signal: controller.signal });
         if (!response.ok) {
-          throw new Error('Failed to fetch transactions');
+          throw new Error('Failed to fetch monthly insights');
         }
 
-        setTransactions((await response.json()).data);
+        setMonthlyTotals((await response.json()).months);
       } catch (err) {
         // A superseded request isn't a failure; leave state for the newer one
         if (err instanceof DOMException && err.name === 'AbortError') return;
         setError(err instanceof Error ? err.message : 'Failed to load data');
-        setTransactions([]);
+        setMonthlyTotals([]);
       } finally {
         if (!controller.signal.aborted) setIsLoading(false);
       }
     };
 
-    fetchTransactions();
+    fetchMonthlyTotals();
 
     // Cancels the previous request when the range changes, so a slow reply
     // can't land after a newer one and overwrite it
     return () => controller.abort();
   }, [startDate, endDate, reloadKey]);
 
-  return { transactions, isLoading, error };
+  return { monthlyTotals, isLoading, error };
 };
@@ -1,4 +1,4 @@
-import { Transaction } from '../components/TransactionViewer/types';
+import { MonthlyCategoryTotal } from '../components/InsightsPanel/types';
 
 export interface MonthlyBucket {
   /** YYYY-MM */
@@ -24,15 +24,15 @@ const MONTH_LABELS = [
   'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec',
 ];
 
-/** Read the YYYY-MM prefix directly — parsing to a Date would risk a timezone shift. */
-const monthKey = (transactionDate: string): string | null => {
-  const match = /^(\d{4})-(\d{2})/.exec(transactionDate);
+/** The server already truncates to YYYY-MM; this only guards the month range. */
+const monthKey = (month: string): string | null => {
+  const match = /^(\d{4})-(\d{2})$/.exec(month);
   if (!match) return null;
 
-  const month = Number(match[2]);
-  if (month < 1 || month > 12) return null;
+  const monthNumber = Number(match[2]);
+  if (monthNumber < 1 || monthNumber > 12) return null;
 
-  return `${match[1]}-${match[2]}`;
+  return month;
 };
 
 const makeBucket = (key: string): MonthlyBucket => {
@@ -75,7 +75,7 @@ const monthsBetween = (firstKey: string, lastKey: string): string[] => {
  * month with a large refund look artificially cheap.
  */
 export const buildMonthlySeries = (
-  transactions: Transaction[],
+  totals: MonthlyCategoryTotal[],
   ignoreReimbursed = false
 ): MonthlyBucket[] => {
   const buckets = new Map<string, MonthlyBucket>();
@@ -84,19 +84,19 @@ export const buildMonthlySeries = (
   // other bar sideways
   const spannedKeys: string[] = [];
 
-  transactions.forEach((transaction) => {
-    if (transaction.cad_amount >= 0) return;
+  totals.forEach((entry) => {
+    if (entry.total >= 0) return;
 
-    const key = monthKey(transaction.transaction_date);
+    const key = monthKey(entry.month);
     if (!key) return;
 
     spannedKeys.push(key);
 
-    if (ignoreReimbursed && transaction.is_reimbursed) return;
+    if (ignoreReimbursed && entry.is_reimbursed) return;
 
     const bucket = buckets.get(key) ?? makeBucket(key);
-    bucket.total += Math.abs(transaction.cad_amount);
-    bucket.count += 1;
+    bucket.total += Math.abs(entry.total);
+    bucket.count += entry.transaction_count;
     buckets.set(key, bucket);
   });
 
@@ -0,0 +1,126 @@
+"""Column-oriented encodings of a /transactions page, for bulk fetches.
+
+The default JSON body repeats every field name on every transaction. These
+send each field once, with its values for the whole page as one array, and
+categories as small integer codes into a list sent alongside. MessagePack
+and Arrow are optional: they're only offered when their package is installed.
+"""
+from enum import Enum
+from typing import List, Sequence
+
+import orjson
+from fastapi import HTTPException, Response
+
+from db.categories import CATEGORY_CODES, CODE_CATEGORIES
+from models.enums import Category, ResponseFormat
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# The codes categories are stored as (db/categories.py), so they're stable
+# across pages, requests and releases, and a client can decode one page with
+# the list it got from another. The list is indexed by code; 0, which no
+# transaction has, is All.
+CATEGORY_DICTIONARY = [
+    {"value": category.value, "description": category.description}
+    for category in [Category.ALL, *(CODE_CATEGORIES[code] for code in range(1, len(CODE_CATEGORIES) + 1))]
+]
+
+MEDIA_TYPES = {
+    ResponseFormat.COLUMNAR: "application/json",
+    ResponseFormat.MSGPACK: "application/msgpack",
+    ResponseFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+
+def check_available(response_format: ResponseFormat) -> None:
+    """406 for a format whose optional package isn't installed."""
+    if response_format == ResponseFormat.MSGPACK and msgpack is None:
+        package = "msgpack"
+    elif response_format == ResponseFormat.ARROW and pa is None:
+        package = "pyarrow"
+    else:
+        return
+    raise HTTPException(
+        status_code=406,
+        detail=f"format={response_format.value} needs the '{package}' package installed on the server",
+    )
+
+
+def _plain(metadata: dict) -> dict:
+    # msgpack and Arrow's schema metadata don't know about enums
+    return {key: value.value if isinstance(value, Enum) else value for key, value in metadata.items()}
+
+
+def to_columns(fields: Sequence[str], rows: List[tuple]) -> dict:
+    """One list per field, in row order. category holds CATEGORY_CODES."""
+    values = list(zip(*rows)) if rows else [() for _ in fields]
+    columns = {field: list(column) for field, column in zip(fields, values)}
+    columns["category"] = [CATEGORY_CODES[category] for category in columns["category"]]
+    columns["is_reimbursed"] = [bool(flag) for flag in columns["is_reimbursed"]]
+    return columns
+
+
+def columnar_document(fields: Sequence[str], rows: List[tuple], metadata: dict) -> dict:
+    return {
+        "columns": to_columns(fields, rows),
+        "categories": CATEGORY_DICTIONARY,
+        "metadata": _plain(metadata),
+    }
+
+
+def _arrow_table(fields: Sequence[str], rows: List[tuple], metadata: dict):
+    columns = to_columns(fields, rows)
+    types = {
+        "id": pa.int64(),
+        "cad_amount": pa.float64(),
+        "usd_amount": pa.float64(),
+        "is_reimbursed": pa.bool_(),
+    }
+
+    arrays = {}
+    for field in fields:
+        if field == "category":
+            arrays[field] = pa.DictionaryArray.from_arrays(
+                pa.array(columns[field], type=pa.int8()),
+                pa.array([category["value"] for category in CATEGORY_DICTIONARY]),
+            )
+        else:
+            arrays[field] = pa.array(columns[field], type=types.get(field, pa.string()))
+
+    return pa.table(arrays).replace_schema_metadata({
+        "metadata": orjson.dumps(_plain(metadata)),
+        "categories": orjson.dumps(CATEGORY_DICTIONARY),
+    })
+
+
+def encode_page(
+        response_format: ResponseFormat,
+        fields: Sequence[str],
+        rows: List[tuple],
+        metadata: dict,
+) -> Response:
+    """A page of TRANSACTION_COLUMNS tuples in one of the columnar formats.
+
+    Arrow carries the page metadata and the category descriptions as JSON in
+    its schema metadata; the category column itself is dictionary-encoded.
+    """
+    if response_format == ResponseFormat.ARROW:
+        table = _arrow_table(fields, rows, metadata)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        content = sink.getvalue().to_pybytes()
+    elif response_format == ResponseFormat.MSGPACK:
+        content = msgpack.packb(columnar_document(fields, rows, metadata))
+    else:
+        content = orjson.dumps(columnar_document(fields, rows, metadata))
+
+    return Response(content=content, media_type=MEDIA_TYPES[response_format])
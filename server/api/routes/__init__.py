@@ -1,4 +1,7 @@
 from .transactions import router as transactions_router
 from .categories import router as categories_router
+from .accounts import router as accounts_router
 from .load_csv import router as load_csv_router
 from .export_csv import router as export_csv_router
+from .insights import router as insights_router
+from .metrics import router as metrics_router
@@ -0,0 +1,50 @@
+import sqlite3
+
+from fastapi import APIRouter, Depends
+
+from db.database import get_db
+
+router = APIRouter()
+
+
+@router.get("/accounts")
+def get_accounts(conn: sqlite3.Connection = Depends(get_db)):
+    """Every account with transactions loaded. `id` is what the `account`
+    filter on /transactions, /categories and /export-csv takes."""
+    cursor = conn.cursor()
+
+    # Counts and date span from the daily rollup, like /categories
+    cursor.execute(
+        """
+        SELECT accounts.id,
+               accounts.account_type,
+               accounts.account_number,
+               totals.count,
+               date(totals.first_day) AS first_date,
+               date(totals.last_day) AS last_date
+        FROM accounts
+        JOIN (
+            SELECT account_id,
+                   SUM(transaction_count) AS count,
+                   MIN(NULLIF(day, 0)) AS first_day,
+                   MAX(NULLIF(day, 0)) AS last_day
+            FROM daily_totals
+            GROUP BY account_id
+        ) AS totals ON totals.account_id = accounts.id
+        ORDER BY accounts.account_type, accounts.account_number
+        """
+    )
+
+    return {
+        "accounts": [
+            {
+                "id": account_id,
+                "account_type": account_type,
+                "account_number": account_number,
+                "transaction_count": count,
+                "first_date": first_date,
+                "last_date": last_date,
+            }
+            for account_id, account_type, account_number, count, first_date, last_date in cursor.fetchall()
+        ]
+    }
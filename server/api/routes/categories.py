@@ -1,69 +1,57 @@
 import sqlite3
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 from typing import Optional
 
-from core.config import DB_PATH
+from db.categories import CODE_CATEGORIES
+from db.database import get_db
+from db.rollups import rollup_filters
 from models.enums import Category, TransactionType
 
 router = APIRouter()
 
 
 @router.get("/categories")
-async def get_categories(
+def get_categories(
+        account: Optional[int] = Query(None, description="Account id to filter by (see /accounts)"),
         start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
         end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
         transaction_type: TransactionType = Query(TransactionType.DEBIT, description="Filter by transaction type"),
+        conn: sqlite3.Connection = Depends(get_db),
 ):
-    conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
-    where_conditions = []
-    params = []
-
-    if start_date:
-        where_conditions.append("transaction_date >= ?")
-        params.append(start_date)
-
-    if end_date:
-        where_conditions.append("transaction_date <= ?")
-        params.append(end_date)
-
-    if transaction_type == TransactionType.DEBIT:
-        where_conditions.append("cad_amount < 0")
-    elif transaction_type == TransactionType.CREDIT:
-        where_conditions.append("cad_amount > 0")
-
-    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+    where_clause, params = rollup_filters(None, start_date, end_date, transaction_type, account)
 
+    # From the daily rollup, so the cost follows the number of days in
+    # range rather than the number of transactions
     cursor.execute(
         f"""
-            SELECT category, COUNT(*) AS count, SUM(cad_amount) AS total
-            FROM transactions
+            SELECT category_code, SUM(transaction_count) AS count, SUM(total_cents) AS total_cents
+            FROM daily_totals
             WHERE {where_clause}
-            GROUP BY category
-            ORDER BY category
+            GROUP BY category_code
         """,
         params,
     )
 
-    results = cursor.fetchall()
-    conn.close()
+    results = [(CODE_CATEGORIES[row[0]], row[1], row[2]) for row in cursor.fetchall()]
 
     categories = [
         {
-            "value": row[0],
-            "description": Category(row[0]).description,
-            "transaction_count": row[1],
-            "total": round(row[2], 2),
+            "value": category.value,
+            "description": category.description,
+            "transaction_count": count,
+            "total": total_cents / 100,
         }
-        for row in results
+        for category, count, total_cents in sorted(results)
     ]
 
     all_transactions = {
         "value": Category.ALL,
         "description": Category.ALL.description,
         "transaction_count": sum(category["transaction_count"] for category in categories),
-        "total": sum(category["total"] for category in categories),
+        # Summed in cents, as each category was, so it matches them exactly
+        "total": sum(total_cents for _, _, total_cents in results) / 100,
     }
 
     categories.insert(0, all_transactions)
@@ -2,12 +2,14 @@ import csv
 import io
 import re
 import sqlite3
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 
-from core.config import DB_PATH
+from db.database import get_db
+from db.filters import build_filters
+from db.search import match_expression, search_join
 from models.enums import Category, SortBy, SortOrder, TransactionType
 
 router = APIRouter()
@@ -27,6 +29,10 @@ CSV_COLUMNS: List[Tuple[str, str]] = [
     ("is_reimbursed", "Is Reimbursed"),
 ]
 
+# Rows pulled from SQLite per chunk. Large enough that per-chunk overhead is
+# noise, small enough that memory stays flat however big the export is.
+EXPORT_CHUNK_ROWS = 1000
+
 # Columns stored as 0/1 in SQLite but written as true/false so the file stays
 # readable. db/loaders.py accepts either form on the way back in.
 BOOLEAN_COLUMNS = {"is_reimbursed"}
@@ -38,34 +44,35 @@ def format_value(column: str, value) -> str:
     return "" if value is None else value
 
 
-def build_filters(
-    category: Optional[str],
-    start_date: Optional[str],
-    end_date: Optional[str],
-    transaction_type: TransactionType,
-) -> Tuple[str, list]:
-    """Mirrors the filtering in /transactions so an export matches what's on screen."""
-    conditions: List[str] = []
-    params: list = []
-
-    if category and category != Category.ALL:
-        conditions.append("category = ?")
-        params.append(category)
-
-    if start_date:
-        conditions.append("transaction_date >= ?")
-        params.append(start_date)
-
-    if end_date:
-        conditions.append("transaction_date <= ?")
-        params.append(end_date)
+def iter_csv_chunks(cursor: sqlite3.Cursor, first_rows: list) -> Iterator[bytes]:
+    """Yield the CSV a chunk at a time, pulling rows from `cursor` as it goes.
 
-    if transaction_type == TransactionType.DEBIT:
-        conditions.append("cad_amount < 0")
-    elif transaction_type == TransactionType.CREDIT:
-        conditions.append("cad_amount > 0")
+    `first_rows` is the batch the caller already fetched to decide between a
+    404 and a download; everything after it is read lazily with fetchmany.
+    """
+    buffer = io.StringIO(newline="")
+    writer = csv.writer(buffer)
 
-    return (" AND ".join(conditions) if conditions else "1=1"), params
+    try:
+        # Leading BOM so Excel reads accented merchant names correctly
+        buffer.write("\ufeff")
+        writer.writerow([header for _, header in CSV_COLUMNS])
+        yield buffer.getvalue().encode("utf-8")
+
+        rows = first_rows
+        while rows:
+            buffer.seek(0)
+            buffer.truncate(0)
+            for row in rows:
+                writer.writerow(
+                    [format_value(column, row[column]) for column, _ in CSV_COLUMNS]
+                )
+            yield buffer.getvalue().encode("utf-8")
+            rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+    finally:
+        # Also runs if the client disconnects mid-download. An unfinished
+        # SELECT would otherwise pin its WAL snapshot on the pooled connection.
+        cursor.close()
 
 
 def build_filename(
@@ -73,9 +80,13 @@ def build_filename(
     start_date: Optional[str],
     end_date: Optional[str],
     transaction_type: TransactionType,
+    account: Optional[int] = None,
 ) -> str:
     parts = ["transactions", transaction_type.value]
 
+    if account is not None:
+        parts.append(f"account_{account}")
+
     if category and category != Category.ALL:
         parts.append(category)
 
@@ -93,57 +104,61 @@ def build_filename(
 
 
 @router.get("/export-csv")
-async def export_csv(
+def export_csv(
     category: Optional[str] = Query(None, description="Category to filter by"),
+    account: Optional[int] = Query(None, description="Account id to filter by (see /accounts)"),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     transaction_type: TransactionType = Query(
         TransactionType.DEBIT, description="Filter by transaction type"
     ),
-    sort_by: SortBy = Query(SortBy.DATE, description="Sort by date or amount"),
+    q: Optional[str] = Query(
+        None, description="Words to find in the descriptions; each matches as a prefix"
+    ),
+    sort_by: SortBy = Query(SortBy.DATE, description="Sort by date, amount or search relevance"),
     sort_order: SortOrder = Query(SortOrder.DESCENDING, description="Sort order"),
+    conn: sqlite3.Connection = Depends(get_db),
 ):
     """Export every transaction matching the filters — no pagination applied."""
-    where_clause, params = build_filters(category, start_date, end_date, transaction_type)
-
-    sort_column = "transaction_date" if sort_by == SortBy.DATE else "cad_amount"
-    direction = "ASC" if sort_order == SortOrder.ASCENDING else "DESC"
-
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            f"""
-            SELECT {", ".join(column for column, _ in CSV_COLUMNS)}
-            FROM transactions
-            WHERE {where_clause}
-            ORDER BY {sort_column} {direction}
-            """,
-            params,
-        )
-        rows = cursor.fetchall()
-    finally:
-        conn.close()
+    where_clause, params = build_filters(category, start_date, end_date, transaction_type, account)
+
+    search_expression = match_expression(q)
+    join_clause, join_params = search_join(search_expression) if search_expression else ("", [])
+
+    if sort_by == SortBy.RELEVANCE:
+        if not search_expression:
+            raise HTTPException(status_code=400, detail="Sorting by relevance needs a search (q)")
+        # Lower rank is a better match, so descending relevance is ascending rank
+        sort_column = "search.rank"
+        direction = "DESC" if sort_order == SortOrder.ASCENDING else "ASC"
+    else:
+        sort_column = "day" if sort_by == SortBy.DATE else "amount_cents"
+        direction = "ASC" if sort_order == SortOrder.ASCENDING else "DESC"
+
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        SELECT {", ".join(column for column, _ in CSV_COLUMNS)}
+        FROM transactions {join_clause}
+        WHERE {where_clause}
+        ORDER BY {sort_column} {direction}
+        """,
+        join_params + params,
+    )
+    first_rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
 
-    if not rows:
+    if not first_rows:
+        cursor.close()
         raise HTTPException(
             status_code=404, detail="No transactions match the current filters"
         )
 
-    buffer = io.StringIO(newline="")
-    writer = csv.writer(buffer)
-    writer.writerow([header for _, header in CSV_COLUMNS])
-    for row in rows:
-        writer.writerow(
-            [format_value(column, row[column]) for column, _ in CSV_COLUMNS]
-        )
-
-    filename = build_filename(category, start_date, end_date, transaction_type)
+    filename = build_filename(category, start_date, end_date, transaction_type, account)
 
+    # get_db is request-scoped, so the connection stays checked out until the
+    # last chunk has been sent rather than going back when this returns
     return StreamingResponse(
-        # Leading BOM so Excel reads accented merchant names correctly
-        iter(["\ufeff" + buffer.getvalue()]),
+        iter_csv_chunks(cursor, first_rows),
         media_type="text/csv; charset=utf-8",
         headers={
             "Content-Disposition": f'attachment; filename="{filename}"',
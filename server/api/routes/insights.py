@@ -0,0 +1,276 @@
+import sqlite3
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from db.categories import CODE_CATEGORIES
+from db.database import get_db
+from db.filters import build_filters
+from db.rollups import rollup_filters
+from models.enums import CategoryOut, MerchantRanking, TransactionType
+
+router = APIRouter()
+
+# Billing cycles /insights/recurring recognizes, as (name, days between charges)
+CADENCES = [
+    ("weekly", 7),
+    ("biweekly", 14),
+    ("monthly", 30.44),
+    ("quarterly", 91.31),
+    ("yearly", 365.25),
+]
+
+# How far a merchant's average gap may sit from a cadence and still count
+CADENCE_TOLERANCE = 0.15
+
+# Coefficients of variation above which charges stop looking like one
+# subscription: gaps jumping around, or amounts that aren't a set price
+MAX_INTERVAL_VARIATION = 0.25
+MAX_AMOUNT_VARIATION = 0.15
+
+
+def coefficient_of_variation(mean: float, mean_of_squares: float) -> float:
+    variance = max(mean_of_squares - mean * mean, 0.0)
+    return variance ** 0.5 / abs(mean) if mean else float("inf")
+
+
+def match_cadence(interval_days: float) -> Optional[str]:
+    for name, days in CADENCES:
+        if abs(interval_days - days) <= days * CADENCE_TOLERANCE:
+            return name
+    return None
+
+
+@router.get("/insights/monthly")
+def get_monthly_insights(
+        category: Optional[str] = Query(None, description="Category to filter by"),
+        start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+        end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+        transaction_type: TransactionType = Query(TransactionType.DEBIT, description="Filter by transaction type"),
+        conn: sqlite3.Connection = Depends(get_db),
+):
+    """Per-month, per-category totals, split by reimbursed status.
+
+    Aggregated in SQLite so the payload grows with the number of months and
+    categories in range rather than with the number of transactions, and
+    read from the daily rollup so the query does too.
+    """
+    where_clause, params = rollup_filters(category, start_date, end_date, transaction_type)
+
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        SELECT strftime('%Y-%m', day) AS month,
+               category_code,
+               is_reimbursed,
+               SUM(transaction_count) AS count,
+               SUM(total_cents) AS total_cents
+        FROM daily_totals
+        -- Dates that never parsed (day 0) have no month to go in
+        WHERE {where_clause} AND day > 0
+        GROUP BY month, category_code, is_reimbursed
+        """,
+        params,
+    )
+    results = [
+        (month, CODE_CATEGORIES[code], is_reimbursed, count, total_cents)
+        for month, code, is_reimbursed, count, total_cents in cursor.fetchall()
+    ]
+
+    # Each category appears in many months, so build its output once
+    category_out = {}
+
+    buckets = []
+    for month, bucket_category, is_reimbursed, count, total_cents in sorted(results):
+        if bucket_category not in category_out:
+            category_out[bucket_category] = CategoryOut.from_category(bucket_category)
+
+        buckets.append({
+            "month": month,
+            "category": category_out[bucket_category],
+            "is_reimbursed": bool(is_reimbursed),
+            "transaction_count": count,
+            "total": total_cents / 100,
+        })
+
+    return {
+        "months": buckets,
+        "metadata": {
+            "category": category,
+            "start_date": start_date,
+            "end_date": end_date,
+            "transaction_type": transaction_type,
+        },
+    }
+
+
+@router.get("/insights/merchants")
+def get_top_merchants(
+        category: Optional[str] = Query(None, description="Category to filter by"),
+        start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+        end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+        transaction_type: TransactionType = Query(TransactionType.DEBIT, description="Filter by transaction type"),
+        rank_by: MerchantRanking = Query(MerchantRanking.SPEND, description="Rank by total spend or by number of transactions"),
+        limit: int = Query(10, ge=1, le=100, description="Number of merchants to return"),
+        conn: sqlite3.Connection = Depends(get_db),
+):
+    """The top merchants in range, grouped on the normalized merchant column."""
+    where_clause, params = build_filters(category, start_date, end_date, transaction_type)
+
+    if rank_by == MerchantRanking.FREQUENCY:
+        order_by = "count DESC, ABS(total_cents) DESC"
+    else:
+        order_by = "ABS(total_cents) DESC, count DESC"
+
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        SELECT merchant,
+               COUNT(*) AS count,
+               -- 0 rather than NULL for a merchant whose amounts are all blank
+               COALESCE(SUM(amount_cents), 0) AS total_cents,
+               date(MIN(NULLIF(day, 0))) AS first_date,
+               date(MAX(NULLIF(day, 0))) AS last_date
+        FROM transactions
+        WHERE {where_clause} AND merchant IS NOT NULL
+        GROUP BY merchant
+        ORDER BY {order_by}, merchant
+        LIMIT ?
+        """,
+        params + [limit],
+    )
+
+    merchants = [
+        {
+            "merchant": merchant,
+            "transaction_count": count,
+            "total": total_cents / 100,
+            "average": round(total_cents / count / 100, 2),
+            "first_date": first_date,
+            "last_date": last_date,
+        }
+        for merchant, count, total_cents, first_date, last_date in cursor.fetchall()
+    ]
+
+    return {
+        "merchants": merchants,
+        "metadata": {
+            "category": category,
+            "start_date": start_date,
+            "end_date": end_date,
+            "transaction_type": transaction_type,
+            "rank_by": rank_by,
+            "limit": limit,
+        },
+    }
+
+
+@router.get("/insights/recurring")
+def get_recurring_charges(
+        category: Optional[str] = Query(None, description="Category to filter by"),
+        start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+        end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+        min_occurrences: int = Query(3, ge=2, description="Charges needed before a merchant counts as recurring"),
+        conn: sqlite3.Connection = Depends(get_db),
+):
+    """Merchants charging a steady amount on a steady cycle: subscriptions,
+    bills, rent.
+
+    Two passes in SQLite, both over the merchant index. A plain GROUP BY
+    first rules out merchants whose amounts vary too much or who are seen
+    too often for even a weekly cycle (groceries, coffee). For the few
+    left, a window function measures the gap before each charge, and each
+    merchant collapses to the mean and spread of its gaps. Only that one
+    row per candidate comes back to Python to be matched against CADENCES.
+    """
+    where_clause, params = build_filters(category, start_date, end_date, TransactionType.DEBIT)
+    where_clause += " AND merchant IS NOT NULL AND day > 0"
+
+    # Tightest cycle allowed, in days: more charges than this permits over
+    # the merchant's date span can't be a subscription
+    shortest_interval = CADENCES[0][1] * (1 - CADENCE_TOLERANCE)
+
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        WITH candidates AS (
+            SELECT merchant
+            FROM transactions
+            WHERE {where_clause}
+            GROUP BY merchant
+            HAVING COUNT(*) >= ?
+               AND COUNT(*) - 1 <= (MAX(day) - MIN(day)) / ?
+               -- variance <= (MAX_AMOUNT_VARIATION * mean)^2, i.e. the
+               -- coefficient of variation without needing sqrt()
+               AND AVG(amount_cents * amount_cents) - AVG(amount_cents) * AVG(amount_cents)
+                   <= ? * AVG(amount_cents) * AVG(amount_cents)
+        ),
+        charges AS (
+            SELECT merchant,
+                   day,
+                   amount_cents,
+                   day - LAG(day) OVER merchant_history AS gap,
+                   -- Only the merchant's last charge has nothing after it
+                   CASE WHEN LEAD(day) OVER merchant_history IS NULL
+                        THEN amount_cents END AS latest_cents
+            FROM transactions
+            WHERE {where_clause} AND merchant IN (SELECT merchant FROM candidates)
+            WINDOW merchant_history AS (PARTITION BY merchant ORDER BY day)
+        )
+        SELECT merchant,
+               COUNT(*) AS count,
+               AVG(gap) AS mean_gap,
+               AVG(gap * gap) AS mean_gap_squared,
+               AVG(amount_cents) AS mean_cents,
+               AVG(amount_cents * amount_cents) AS mean_cents_squared,
+               MAX(latest_cents) AS latest_cents,
+               date(MIN(day)) AS first_date,
+               date(MAX(day)) AS last_date
+        FROM charges
+        GROUP BY merchant
+        """,
+        params + [min_occurrences, shortest_interval, MAX_AMOUNT_VARIATION ** 2] + params,
+    )
+
+    recurring = []
+    for row in cursor.fetchall():
+        if not row["mean_gap"]:
+            continue
+
+        cadence = match_cadence(row["mean_gap"])
+        if cadence is None:
+            continue
+        if coefficient_of_variation(row["mean_gap"], row["mean_gap_squared"]) > MAX_INTERVAL_VARIATION:
+            continue
+        if coefficient_of_variation(row["mean_cents"], row["mean_cents_squared"]) > MAX_AMOUNT_VARIATION:
+            continue
+
+        mean_amount = row["mean_cents"] / 100
+
+        last_date = date.fromisoformat(row["last_date"])
+        recurring.append({
+            "merchant": row["merchant"],
+            "cadence": cadence,
+            "interval_days": round(row["mean_gap"], 1),
+            "transaction_count": row["count"],
+            "average_amount": round(mean_amount, 2),
+            "latest_amount": row["latest_cents"] / 100,
+            "annual_cost": round(mean_amount * 365.25 / row["mean_gap"], 2),
+            "first_date": row["first_date"],
+            "last_date": row["last_date"],
+            "next_expected_date": (last_date + timedelta(days=round(row["mean_gap"]))).isoformat(),
+        })
+
+    # Costliest first: debits are negative, so ascending
+    recurring.sort(key=lambda charge: charge["annual_cost"])
+
+    return {
+        "recurring": recurring,
+        "metadata": {
+            "category": category,
+            "start_date": start_date,
+            "end_date": end_date,
+            "min_occurrences": min_occurrences,
+        },
+    }
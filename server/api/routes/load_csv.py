@@ -1,34 +1,95 @@
+import os
 import shutil
+import tempfile
 from pathlib import Path
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
 
 from core.config import DB_PATH
-from db.database import init_db
-from db.loaders import load_csv_to_db
+from core.jobs import ImportJob, ImportJobs, get_import_jobs
+from db.loaders import LoadResult, validate_header
+from models.enums import ImportMode
 
 router = APIRouter()
 
 # Uploads land next to the SQLite file (i.e. server/data/)
 UPLOAD_DIR = Path(DB_PATH).parent
 
+IMPORT_MODE_QUERY = Query(
+    ImportMode.REPLACE,
+    description="'replace' swaps in the file's contents; 'replace_accounts' does so only for the "
+                "accounts in the file; 'append' adds only transactions not already loaded",
+)
+
+
+def load_summary(result: LoadResult, mode: ImportMode) -> dict:
+    if mode == ImportMode.APPEND:
+        message = (
+            f"Added {result.inserted} new transactions "
+            f"({result.skipped} already loaded)"
+        )
+    elif mode == ImportMode.REPLACE_ACCOUNTS:
+        message = f"Successfully loaded {result.rows} transactions; other accounts were left as they were"
+    else:
+        message = f"Successfully loaded {result.rows} transactions"
+
+    return {
+        "message": message,
+        "rows": result.rows,
+        "inserted": result.inserted,
+        "skipped": result.skipped,
+    }
+
+
+def save_upload(file: UploadFile, destination: Path) -> None:
+    """Blocking half of /upload-csv: write the upload to disk and check its header."""
+    try:
+        with destination.open("wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+    except OSError as e:
+        destination.unlink(missing_ok=True)
+        raise HTTPException(status_code=500, detail=f"Could not save upload: {e}")
 
-@router.post("/load-csv")
-async def load_csv(csv_path: str):
     try:
-        init_db()
-        row_count = load_csv_to_db(csv_path)
-        return {
-            "message": f"Successfully loaded {row_count} transactions",
-            "rows": row_count,
-        }
+        validate_header(str(destination))
     except Exception as e:
+        # Don't leave a rejected file sitting in data/
+        destination.unlink(missing_ok=True)
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.post("/upload-csv")
-async def upload_csv(file: UploadFile = File(...)):
-    """Accept a CSV uploaded from the browser, save it, then load it into the DB.
+def job_status(job: ImportJob) -> dict:
+    status = job.to_dict()
+    if job.result:
+        status.update(load_summary(job.result, job.mode))
+    return status
+
+
+# Loads run in the background (see core/jobs.py): both routes check the file
+# up front so an obviously wrong one fails here, then return 202 with a job
+# id to poll on /jobs/{job_id}
+@router.post("/load-csv", status_code=202)
+def load_csv(
+    csv_path: str,
+    mode: ImportMode = IMPORT_MODE_QUERY,
+    jobs: ImportJobs = Depends(get_import_jobs),
+):
+    try:
+        validate_header(csv_path)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return job_status(jobs.submit(csv_path, mode))
+
+
+@router.post("/upload-csv", status_code=202)
+async def upload_csv(
+    file: UploadFile = File(...),
+    mode: ImportMode = IMPORT_MODE_QUERY,
+    jobs: ImportJobs = Depends(get_import_jobs),
+):
+    """Accept a CSV uploaded from the browser, save it, then queue it for loading.
 
     Unlike /load-csv, this does not need a server-side path: the browser sends
     the file itself as multipart/form-data.
@@ -40,26 +101,29 @@ async def upload_csv(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Only .csv files are accepted")
 
     UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-    destination = UPLOAD_DIR / filename
+    # A name of its own, so a second upload of the same file can't
+    # overwrite this one while its job is still queued or reading it, or
+    # have it deleted when the other job ends. The job deletes it once it's
+    # loaded.
+    fd, path = tempfile.mkstemp(prefix=f"{Path(filename).stem}_", suffix=".csv", dir=UPLOAD_DIR)
+    os.close(fd)
+    destination = Path(path)
 
+    # Stays async to close the upload, but the copy is blocking and goes to
+    # the worker pool
     try:
-        with destination.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except OSError as e:
-        raise HTTPException(status_code=500, detail=f"Could not save upload: {e}")
+        await run_in_threadpool(save_upload, file, destination)
     finally:
         await file.close()
 
-    try:
-        init_db()
-        row_count = load_csv_to_db(str(destination))
-    except Exception as e:
-        # Don't leave a rejected file sitting in data/
-        destination.unlink(missing_ok=True)
-        raise HTTPException(status_code=400, detail=str(e))
+    job = jobs.submit(str(destination), mode, filename=filename, delete_when_done=True)
+    return job_status(job)
 
-    return {
-        "message": f"Successfully loaded {row_count} transactions",
-        "filename": filename,
-        "rows": row_count,
-    }
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str, jobs: ImportJobs = Depends(get_import_jobs)):
+    """Progress of a queued import: rows so far, throughput, and the outcome."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Import job '{job_id}' not found")
+    return job_status(job)
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+
+from core.metrics import PROMETHEUS_CONTENT_TYPE, metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+def get_metrics():
+    """Per-route latency histograms, response bytes, and per-statement SQL
+    executions, time, rows and VM steps, for Prometheus to scrape."""
+    return Response(content=metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
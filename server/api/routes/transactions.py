@@ -1,11 +1,22 @@
+import base64
+import binascii
+import json
 import math
 import sqlite3
-from typing import Optional
-from fastapi import APIRouter, Query, HTTPException
+from typing import List, Optional, Tuple
 
-from models.enums import Category, TransactionType, SortBy, SortOrder, CategoryOut
-from schemas.transaction import Transaction, PaginatedResponse
-from core.config import DB_PATH
+import orjson
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
+
+from api.formats import check_available, encode_page
+from models.enums import Category, TransactionType, SortBy, SortOrder, CategoryOut, PaginationMode, ResponseFormat
+from schemas.transaction import BulkFilter, BulkUpdate, Transaction, PaginatedResponse
+from db.categories import CATEGORY_CODES
+from db.database import get_db
+from db.filters import build_filters
+from db.rollups import rollup_filters
+from db.search import match_expression, search_join
+from db.version import data_version
 
 router = APIRouter()
 
@@ -16,6 +27,7 @@ TRANSACTION_COLUMNS = """
     cheque_number, description_1, description_2,
     cad_amount, usd_amount, category, is_reimbursed
 """
+TRANSACTION_FIELDS = [column.strip() for column in TRANSACTION_COLUMNS.split(",")]
 
 
 def to_transaction(row) -> Transaction:
@@ -24,136 +36,424 @@ def to_transaction(row) -> Transaction:
     return Transaction(**row_dict)
 
 
+# Serialized form of each category, built once rather than per row
+CATEGORY_JSON = {
+    category.value: {"value": category.value, "description": category.description}
+    for category in Category
+}
+
+
+def to_transaction_dicts(rows: List[tuple]) -> List[dict]:
+    """The Transaction schema's JSON shape, from plain TRANSACTION_COLUMNS tuples.
+
+    For list pages. A Transaction and CategoryOut model per row, validated
+    again against response_model, costs far more than the query once pages
+    get large, and the rows are already the right types.
+    """
+    category_index = TRANSACTION_FIELDS.index("category")
+    reimbursed_index = TRANSACTION_FIELDS.index("is_reimbursed")
+
+    transactions = []
+    for row in rows:
+        transaction = dict(zip(TRANSACTION_FIELDS, row))
+        transaction["category"] = CATEGORY_JSON[row[category_index]]
+        transaction["is_reimbursed"] = bool(row[reimbursed_index])
+        transactions.append(transaction)
+    return transactions
+
+
+def page_response(rows: List[tuple], metadata: dict, response_format: ResponseFormat) -> Response:
+    """A PaginatedResponse body, serialized by orjson without re-validation,
+    or the same page in one of the columnar formats (api/formats.py)."""
+    if response_format != ResponseFormat.JSON:
+        return encode_page(response_format, TRANSACTION_FIELDS, rows, metadata)
+    return Response(
+        content=orjson.dumps({"data": to_transaction_dicts(rows), "metadata": metadata}),
+        media_type="application/json",
+    )
+
+
+def not_found_detail(
+        category: Optional[str],
+        start_date: Optional[str],
+        end_date: Optional[str],
+        transaction_type: TransactionType,
+        q: Optional[str] = None,
+        account: Optional[int] = None,
+) -> str:
+    filter_desc = []
+    if q:
+        filter_desc.append(f"search: {q}")
+    if account is not None:
+        filter_desc.append(f"account: {account}")
+    if category:
+        filter_desc.append(f"category: {category}")
+    if transaction_type != TransactionType.ALL:
+        filter_desc.append(f"transaction type: {transaction_type}")
+    if start_date or end_date:
+        filter_desc.append("the given date range")
+
+    detail = "No transactions found"
+    if filter_desc:
+        detail += f" for {' with '.join(filter_desc)}"
+    return detail
+
+
+def encode_cursor(sort_by: SortBy, sort_order: SortOrder, sort_value, transaction_id: int) -> str:
+    """Opaque token pointing just past the last row of a page.
+
+    The sort it was issued for travels with it, so a cursor can't silently
+    be replayed against a different ordering.
+    """
+    payload = [sort_by.value, sort_order.value, sort_value, transaction_id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort_by: SortBy, sort_order: SortOrder) -> Tuple[object, int]:
+    try:
+        cursor_sort_by, cursor_sort_order, sort_value, transaction_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode())
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Both sort keys are stored as integers (day number, cents); a date
+    # string or float here is a cursor from before that, and would compare
+    # against the wrong type in SQLite. null is a row without an amount.
+    if not isinstance(sort_value, (int, type(None))) or not isinstance(transaction_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if (cursor_sort_by, cursor_sort_order) != (sort_by.value, sort_order.value):
+        raise HTTPException(
+            status_code=400, detail="Cursor was issued for a different sort order"
+        )
+
+    return sort_value, transaction_id
+
+
+def seek_clauses(
+        sort_column: str, sort_order: SortOrder, sort_value, last_id: int
+) -> List[Tuple[str, list]]:
+    """Conditions for the rows after a cursor, in the order pages reach them.
+
+    SQLite sorts NULLs first ascending and last descending, and a row-value
+    comparison with NULL is never true, so rows without a sort value (RBC
+    leaves CAD$ blank on some) are a group of their own. Each condition is
+    a range the sort index seeks to directly; OR-ing them into one would
+    scan the index from the start instead.
+    """
+    ascending = sort_order == SortOrder.ASCENDING
+    # id breaks ties so rows sharing a date or amount are neither
+    # repeated nor skipped across pages
+    comparison = ">" if ascending else "<"
+
+    if sort_value is None:
+        clauses = [(f"{sort_column} IS NULL AND id {comparison} ?", [last_id])]
+        if ascending:
+            clauses.append((f"{sort_column} IS NOT NULL", []))
+    else:
+        clauses = [(f"({sort_column}, id) {comparison} (?, ?)", [sort_value, last_id])]
+        if not ascending:
+            clauses.append((f"{sort_column} IS NULL", []))
+    return clauses
+
+
 @router.get("/transactions", response_model=PaginatedResponse)
-async def get_transactions(
+def get_transactions(
         category: Optional[str] = Query(None, description="Category to filter by"),
+        account: Optional[int] = Query(None, description="Account id to filter by (see /accounts)"),
         page: int = Query(1, ge=1),
         page_size: int = Query(10, ge=1, le=10000000),
         start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
         end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
         transaction_type: TransactionType = Query(TransactionType.DEBIT, description="Filter by transaction type"),
-        sort_by: SortBy = Query(SortBy.DATE, description="Sort by date or amount"),
+        q: Optional[str] = Query(
+            None, description="Words to find in the descriptions; each matches as a prefix"
+        ),
+        sort_by: SortBy = Query(SortBy.DATE, description="Sort by date, amount or search relevance"),
         sort_order: SortOrder = Query(SortOrder.DESCENDING, description="Sort order"),
+        pagination: PaginationMode = Query(
+            PaginationMode.OFFSET,
+            description="'offset' pages by number; 'cursor' seeks from `cursor` and returns `next_cursor`",
+        ),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page (cursor mode)"),
+        include_totals: bool = Query(
+            True, description="Cursor mode only: skip the count/total query when false"
+        ),
+        response_format: ResponseFormat = Query(
+            ResponseFormat.JSON,
+            alias="format",
+            description="'columnar' sends an array per field with category codes; "
+                        "'msgpack' and 'arrow' are the same, binary, when installed",
+        ),
+        conn: sqlite3.Connection = Depends(get_db),
 ):
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+    check_available(response_format)
 
-    # Build WHERE clause with optional category, date, and transaction type filters
-    where_conditions = []
-    params = []
+    db_cursor = conn.cursor()
+    # Page rows come back as plain tuples: cheaper to fetch than sqlite3.Row,
+    # and to_transaction_dicts only needs positions
+    page_cursor = conn.cursor()
+    page_cursor.row_factory = None
 
-    if category and category != Category.ALL:
-        where_conditions.append("category = ?")
-        params.append(category)
+    where_clause, params = build_filters(category, start_date, end_date, transaction_type, account)
 
-    if start_date:
-        where_conditions.append("transaction_date >= ?")
-        params.append(start_date)
+    is_cursor_mode = pagination == PaginationMode.CURSOR
 
-    if end_date:
-        where_conditions.append("transaction_date <= ?")
-        params.append(end_date)
+    search_expression = match_expression(q)
+    join_clause, join_params = search_join(search_expression) if search_expression else ("", [])
 
-    if transaction_type == TransactionType.DEBIT:
-        where_conditions.append("cad_amount < 0")
-    elif transaction_type == TransactionType.CREDIT:
-        where_conditions.append("cad_amount > 0")
-    # If "all", no condition is added
+    if sort_by == SortBy.RELEVANCE:
+        if not search_expression:
+            raise HTTPException(status_code=400, detail="Sorting by relevance needs a search (q)")
+        if is_cursor_mode:
+            # A cursor holds a value from the row itself, and rank isn't one
+            raise HTTPException(status_code=400, detail="Cursor pagination can't sort by relevance")
 
-    # Build WHERE clause or use "1=1" if no conditions
-    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+    # Build ORDER BY clause
+    if sort_by == SortBy.RELEVANCE:
+        # Lower rank is a better match, so descending relevance is ascending rank
+        sort_column = "search.rank"
+        order_direction = "DESC" if sort_order == SortOrder.ASCENDING else "ASC"
+    else:
+        sort_column = "day" if sort_by == SortBy.DATE else "amount_cents"
+        order_direction = "ASC" if sort_order == SortOrder.ASCENDING else "DESC"
+    order_clause = f"{sort_column} {order_direction}"
 
-    # Get count and total with filters
-    cursor.execute(
-        f"SELECT COUNT(*) AS count, SUM(cad_amount) AS total FROM transactions WHERE {where_clause}",
-        params,
-    )
-    result = cursor.fetchone()
-    total_items = result["count"]
-    category_total = result["total"] or 0.0
-
-    if total_items == 0:
-        conn.close()
-        filter_desc = []
-        if category:
-            filter_desc.append(f"category: {category}")
-        if transaction_type != TransactionType.ALL:
-            filter_desc.append(f"transaction type: {transaction_type}")
-        if start_date or end_date:
-            filter_desc.append("the given date range")
-
-        detail = "No transactions found"
-        if filter_desc:
-            detail += f" for {' with '.join(filter_desc)}"
-
-        raise HTTPException(status_code=404, detail=detail)
+    # Offset mode needs the count for total_pages. In cursor mode it's the
+    # only part of a page turn that grows with the result set, so it's opt-out.
+    total_items = None
+    category_total = None
+    if not is_cursor_mode or include_totals:
+        if search_expression:
+            # The rollup knows nothing about descriptions, so a search is
+            # totalled from its matching rows
+            db_cursor.execute(
+                f"""
+                SELECT COUNT(*) AS count, SUM(amount_cents) AS total_cents
+                FROM transactions {join_clause}
+                WHERE {where_clause}
+                """,
+                join_params + params,
+            )
+        else:
+            # Same filters, answered from the daily rollup instead of the rows
+            totals_clause, totals_params = rollup_filters(
+                category, start_date, end_date, transaction_type, account
+            )
+            db_cursor.execute(
+                f"""
+                SELECT COALESCE(SUM(transaction_count), 0) AS count, SUM(total_cents) AS total_cents
+                FROM daily_totals
+                WHERE {totals_clause}
+                """,
+                totals_params,
+            )
+        result = db_cursor.fetchone()
+        total_items = result["count"]
+        category_total = (result["total_cents"] or 0) / 100
+
+        if total_items == 0:
+            raise HTTPException(
+                status_code=404,
+                detail=not_found_detail(category, start_date, end_date, transaction_type, q, account),
+            )
+
+    filter_metadata = {
+        "q": q,
+        "category": category,
+        "account": account,
+        "start_date": start_date,
+        "end_date": end_date,
+        "transaction_type": transaction_type,
+        "sort_by": sort_by,
+        "sort_order": sort_order,
+    }
+
+    if is_cursor_mode:
+        seeks = [("1=1", [])]
+        if cursor:
+            seeks = seek_clauses(sort_column, sort_order, *decode_cursor(cursor, sort_by, sort_order))
+
+        # One extra row tells us whether there's a next page without counting.
+        # The stored sort value rides along at the end for the next cursor;
+        # the serializers zip rows with TRANSACTION_FIELDS, which drops it.
+        rows = []
+        for seek_clause, seek_params in seeks:
+            page_cursor.execute(
+                f"""
+                SELECT {TRANSACTION_COLUMNS}, {sort_column} AS sort_key
+                FROM transactions {join_clause}
+                WHERE {where_clause} AND {seek_clause}
+                ORDER BY {order_clause}, id {order_direction}
+                LIMIT ?
+                """,
+                join_params + params + seek_params + [page_size + 1 - len(rows)],
+            )
+            rows += page_cursor.fetchall()
+            if len(rows) > page_size:
+                break
+
+        if not rows and not cursor:
+            raise HTTPException(
+                status_code=404,
+                detail=not_found_detail(category, start_date, end_date, transaction_type, q, account),
+            )
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = (
+            encode_cursor(
+                sort_by,
+                sort_order,
+                rows[-1][-1],
+                rows[-1][TRANSACTION_FIELDS.index("id")],
+            )
+            if has_more
+            else None
+        )
+
+        return page_response(
+            rows,
+            {
+                "pagination": pagination,
+                "page_size": page_size,
+                "next_cursor": next_cursor,
+                "total_pages": math.ceil(total_items / page_size) if total_items is not None else None,
+                "total_items": total_items,
+                "category_total": round(category_total, 2) if category_total is not None else None,
+                **filter_metadata,
+            },
+            response_format,
+        )
 
     total_pages = math.ceil(total_items / page_size)
     offset = (page - 1) * page_size
 
-    # Build ORDER BY clause
-    sort_column = "transaction_date" if sort_by == SortBy.DATE else "cad_amount"
-    order_direction = "ASC" if sort_order == SortOrder.ASCENDING else "DESC"
-    order_clause = f"{sort_column} {order_direction}"
-
     # Get paginated transactions with filters and sorting
-    cursor.execute(
+    page_cursor.execute(
         f"""
         SELECT {TRANSACTION_COLUMNS}
-        FROM transactions
+        FROM transactions {join_clause}
         WHERE {where_clause}
         ORDER BY {order_clause}
         LIMIT ? OFFSET ?
         """,
-        params + [page_size, offset],
+        join_params + params + [page_size, offset],
     )
 
-    rows = cursor.fetchall()
-    conn.close()
+    rows = page_cursor.fetchall()
 
-    transactions = [to_transaction(row) for row in rows]
-
-    return PaginatedResponse(
-        data=transactions,
-        metadata={
+    return page_response(
+        rows,
+        {
             "page": page,
             "page_size": page_size,
             "total_pages": total_pages,
             "total_items": total_items,
             "category_total": round(category_total, 2),
-            "category": category,
-            "start_date": start_date,
-            "end_date": end_date,
-            "transaction_type": transaction_type,
-            "sort_by": sort_by,
-            "sort_order": sort_order,
+            **filter_metadata,
         },
+        response_format,
+    )
+
+
+def bulk_filter_clause(bulk_filter: BulkFilter) -> Tuple[str, list]:
+    where_clause, params = build_filters(
+        bulk_filter.category,
+        bulk_filter.start_date,
+        bulk_filter.end_date,
+        bulk_filter.transaction_type,
+        bulk_filter.account,
     )
 
+    if bulk_filter.description:
+        # LIKE is case-insensitive for ASCII; escape its wildcards so the
+        # text is matched literally
+        pattern = "%" + bulk_filter.description.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        where_clause += " AND (description_1 LIKE ? ESCAPE '\\' OR description_2 LIKE ? ESCAPE '\\')"
+        params += [pattern, pattern]
+
+    if bulk_filter.merchant:
+        where_clause += " AND merchant = ?"
+        params.append(bulk_filter.merchant)
+
+    return where_clause, params
+
+
+@router.patch("/transactions/bulk")
+def bulk_update_transactions(
+        update: BulkUpdate,
+        conn: sqlite3.Connection = Depends(get_db),
+):
+    """Set category and/or reimbursed on many transactions in one write.
+
+    Recategorizing a merchant one PATCH at a time costs a round trip and a
+    commit per row; this is a single transaction however many rows match.
+    """
+    if (update.ids is None) == (update.filter is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'ids' or 'filter'")
+
+    if update.category is None and update.is_reimbursed is None:
+        raise HTTPException(status_code=400, detail="Nothing to update: set 'category' and/or 'is_reimbursed'")
+
+    if update.category == Category.ALL:
+        raise HTTPException(status_code=400, detail="Cannot set a transaction to this category")
+
+    assignments = []
+    values: list = []
+    if update.category is not None:
+        assignments.append("category_code = ?")
+        values.append(CATEGORY_CODES[update.category])
+    if update.is_reimbursed is not None:
+        assignments.append("is_reimbursed = ?")
+        values.append(int(update.is_reimbursed))
+    set_clause = ", ".join(assignments)
+
+    cursor = conn.cursor()
+
+    if update.ids is not None:
+        # A set, so a repeated id isn't counted twice
+        ids = sorted(set(update.ids))
+        cursor.executemany(
+            f"UPDATE transactions SET {set_clause} WHERE id = ?",
+            [(*values, transaction_id) for transaction_id in ids],
+        )
+    else:
+        where_clause, params = bulk_filter_clause(update.filter)
+        if where_clause == "1=1":
+            # An empty filter would silently rewrite the whole table
+            raise HTTPException(status_code=400, detail="Filter must narrow the selection")
+        cursor.execute(f"UPDATE transactions SET {set_clause} WHERE {where_clause}", values + params)
+
+    updated = cursor.rowcount
+    conn.commit()
+    data_version.bump()
+
+    return {"updated": updated}
+
 
 @router.patch("/transactions/{transaction_id}/category", response_model=Transaction)
-async def update_transaction_category(
+def update_transaction_category(
         transaction_id: int,
         category: Category = Query(..., description="New category for the transaction"),
+        conn: sqlite3.Connection = Depends(get_db),
 ):
     if category == Category.ALL:
         raise HTTPException(status_code=400, detail="Cannot set a transaction to this category")
 
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
     cursor.execute(
-        "UPDATE transactions SET category = ? WHERE id = ?",
-        (category.value, transaction_id),
+        "UPDATE transactions SET category_code = ? WHERE id = ?",
+        (CATEGORY_CODES[category], transaction_id),
     )
 
     if cursor.rowcount == 0:
-        conn.close()
         raise HTTPException(status_code=404, detail="Transaction not found")
 
     conn.commit()
+    data_version.bump()
 
     cursor.execute(
         f"""
@@ -165,18 +465,16 @@ async def update_transaction_category(
     )
 
     row = cursor.fetchone()
-    conn.close()
 
     return to_transaction(row)
 
 
 @router.patch("/transactions/{transaction_id}/reimbursed", response_model=Transaction)
-async def update_transaction_reimbursed(
+def update_transaction_reimbursed(
         transaction_id: int,
         is_reimbursed: bool = Query(..., description="Whether this transaction has been reimbursed"),
+        conn: sqlite3.Connection = Depends(get_db),
 ):
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
     cursor.execute(
@@ -185,10 +483,10 @@ async def update_transaction_reimbursed(
     )
 
     if cursor.rowcount == 0:
-        conn.close()
         raise HTTPException(status_code=404, detail="Transaction not found")
 
     conn.commit()
+    data_version.bump()
 
     cursor.execute(
         f"""
@@ -200,6 +498,5 @@ async def update_transaction_reimbursed(
     )
 
     row = cursor.fetchone()
-    conn.close()
 
     return to_transaction(row)
@@ -0,0 +1,84 @@
+"""Bytes on the wire and latency of compressed responses, per encoding.
+
+Loads a synthetic export into a scratch database, then requests a few
+representative payloads through the full app (middleware included) with
+each Accept-Encoding the server supports. brotli and zstd only appear when
+their packages are installed. Run from server/:
+
+    python -m benchmarks.compression --rows 100000
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from benchmarks.synthetic import write_synthetic_csv
+from core.compression import ENCODERS
+from core.config import DB_PATH
+from db.database import init_db
+from db.loaders import load_csv_to_db
+
+PAYLOADS = [
+    ("UI page (100 rows)", "/transactions?page_size=100"),
+    ("JSON page (10k rows)", "/transactions?page_size=10000&transaction_type=all"),
+    ("columnar page (10k rows)", "/transactions?page_size=10000&transaction_type=all&format=columnar"),
+    ("/categories", "/categories"),
+    ("CSV export (all rows)", "/export-csv?transaction_type=all"),
+]
+
+
+def fetch(client: TestClient, url: str, encoding: str):
+    """Wire size, Content-Encoding and seconds for one request."""
+    started = time.perf_counter()
+    with client.stream("GET", url, headers={"Accept-Encoding": encoding}) as response:
+        size = sum(len(chunk) for chunk in response.iter_raw())
+        content_encoding = response.headers.get("content-encoding", "identity")
+    return size, content_encoding, time.perf_counter() - started
+
+
+def main(rows: int, seed: int, repeats: int) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        Path(DB_PATH).parent.mkdir(parents=True)
+
+        csv_path = str(Path(workdir) / "synthetic.csv")
+        write_synthetic_csv(csv_path, rows, seed)
+        conn = sqlite3.connect(DB_PATH)
+        init_db(conn)
+        load_csv_to_db(csv_path, conn)
+        conn.close()
+
+        # Imported here so the app's pool opens the scratch database
+        from main import app
+
+        encodings = ["identity", *ENCODERS]
+        with TestClient(app) as client:
+            for label, url in PAYLOADS:
+                print(label)
+                identity_size = None
+                for encoding in encodings:
+                    # Repeats are response cache hits, as most real requests
+                    # are, so the timings are mostly compression cost
+                    samples = [fetch(client, url, encoding) for _ in range(repeats)]
+                    size, content_encoding, _ = samples[-1]
+                    seconds = statistics.median(sample[2] for sample in samples)
+                    identity_size = identity_size or size
+                    print(
+                        f"  {content_encoding:<9} {size:>12,} bytes  {size / identity_size:6.1%}"
+                        f"  {seconds * 1000:9.1f} ms"
+                    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    main(args.rows, args.seed, args.repeats)
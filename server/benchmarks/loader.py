@@ -0,0 +1,81 @@
+"""Throughput of the CSV loader on a synthetic RBC export.
+
+Compares the per-row parsers against their vectorized replacements, then
+times a full load_csv_to_db into a scratch database. Run from server/:
+
+    python -m benchmarks.loader --rows 1000000
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import write_synthetic_csv
+from db.database import init_db
+from db.loaders import (
+    load_csv_to_db,
+    normalize_date,
+    normalize_dates,
+    parse_reimbursed,
+    parse_reimbursed_column,
+)
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def report(label: str, rows: int, seconds: float) -> None:
+    print(f"  {label:<34} {seconds:8.3f}s  {rows / seconds:>12,.0f} rows/s")
+
+
+def main(rows: int, seed: int) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = str(Path(workdir) / "synthetic.csv")
+        _, seconds = timed(write_synthetic_csv, csv_path, rows, seed)
+        print(f"Generated {rows:,} rows in {seconds:.1f}s\n")
+
+        df = pd.read_csv(csv_path, dtype=str)
+
+        # Hand-edited files mix spellings and leave blanks, so the
+        # reimbursed column is exercised with a realistic mix
+        rng = np.random.default_rng(seed)
+        reimbursed = pd.Series(
+            rng.choice(["true", "false", "", "Yes", "0", "1.0"], size=rows)
+        ).replace("", np.nan)
+
+        print("Date parsing")
+        scalar_dates, seconds = timed(df["Transaction Date"].apply, normalize_date)
+        report("per-row normalize_date", rows, seconds)
+        vector_dates, seconds = timed(normalize_dates, df["Transaction Date"])
+        report("vectorized normalize_dates", rows, seconds)
+        assert scalar_dates.tolist() == vector_dates.tolist()
+
+        print("Reimbursed parsing")
+        scalar_flags, seconds = timed(reimbursed.apply, parse_reimbursed)
+        report("per-row parse_reimbursed", rows, seconds)
+        vector_flags, seconds = timed(parse_reimbursed_column, reimbursed)
+        report("vectorized parse_reimbursed_column", rows, seconds)
+        assert scalar_flags.tolist() == vector_flags.tolist()
+
+        print("Full load")
+        conn = sqlite3.connect(str(Path(workdir) / "bench.db"))
+        init_db(conn)
+        _, seconds = timed(load_csv_to_db, csv_path, conn)
+        report("load_csv_to_db (replace)", rows, seconds)
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    main(args.rows, args.seed)
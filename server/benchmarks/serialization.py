@@ -0,0 +1,76 @@
+"""Rows per second turning a /transactions page query into its JSON body.
+
+Compares the old path (a Transaction model per row, then FastAPI's
+response_model validation and json.dumps) with the direct orjson path the
+route now uses, on the same rows. Run from server/:
+
+    python -m benchmarks.serialization --rows 200000
+"""
+import argparse
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import orjson
+from pydantic import TypeAdapter
+
+from api.routes.transactions import TRANSACTION_COLUMNS, to_transaction, to_transaction_dicts
+from benchmarks.loader import report, timed
+from benchmarks.synthetic import write_synthetic_csv
+from db.database import init_db
+from db.loaders import load_csv_to_db
+from schemas.transaction import PaginatedResponse
+
+PAGE_QUERY = f"SELECT {TRANSACTION_COLUMNS} FROM transactions"
+
+METADATA = {"page": 1, "page_size": 0, "category": None, "transaction_type": "debit"}
+
+
+def model_path(conn: sqlite3.Connection) -> bytes:
+    """What the route did before: sqlite3.Row results, a model per row, then
+    FastAPI re-validating the returned model against response_model."""
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(PAGE_QUERY).fetchall()
+    page = PaginatedResponse(data=[to_transaction(row) for row in rows], metadata=METADATA)
+    adapter = TypeAdapter(PaginatedResponse)
+    validated = adapter.validate_python(page.model_dump())
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def direct_path(conn: sqlite3.Connection) -> bytes:
+    conn.row_factory = None
+    rows = conn.execute(PAGE_QUERY).fetchall()
+    return orjson.dumps({"data": to_transaction_dicts(rows), "metadata": METADATA})
+
+
+def main(rows: int, seed: int) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = str(Path(workdir) / "synthetic.csv")
+        write_synthetic_csv(csv_path, rows, seed)
+
+        conn = sqlite3.connect(str(Path(workdir) / "bench.db"))
+        init_db(conn)
+        load_csv_to_db(csv_path, conn)
+
+        # Fetch included: the row type is part of what changed
+        print(f"Fetching and serializing a page of {rows:,} transactions")
+        before, seconds = timed(model_path, conn)
+        report("Rows + models + response_model", rows, seconds)
+        after, seconds = timed(direct_path, conn)
+        report("tuples + dicts + orjson", rows, seconds)
+        conn.close()
+
+    # Same document, byte-for-byte modulo formatting
+    assert json.loads(before) == json.loads(after)
+    print(f"\n  body size: {len(after):,} bytes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    main(args.rows, args.seed)
@@ -0,0 +1,353 @@
+"""End-to-end benchmarks of loading, querying and exporting, as JSON.
+
+For each --rows size this writes a synthetic RBC export (see
+benchmarks/synthetic.py), loads it into a scratch database through the
+app's own /load-csv job, then drives the app with FastAPI's TestClient:
+
+- load throughput for replace, append (every row already loaded) and
+  replace_accounts imports, as reported by the import job
+- /transactions latency over filter x sort x pagination combinations
+- /categories latency over a few filters
+- /export-csv throughput, uncompressed and gzip
+- the peak RSS of each phase
+
+Run from server/, once per commit, and diff the two files:
+
+    python -m benchmarks.suite --rows 10000 1000000 --output before.json
+    python -m benchmarks.suite --rows 10000 1000000 --output after.json --baseline before.json
+
+Same --seed, same data: everything but the timings comes out identical.
+Latencies are medians over --repeats requests. Each one carries its own
+`_run` query parameter, which the routes ignore but the response cache
+keys on, so every request is computed rather than replayed from memory.
+`sql_ms` is the SQL share of it, from the Server-Timing header.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import product
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from fastapi.testclient import TestClient
+
+from benchmarks.synthetic import write_synthetic_csv
+from core.compression import ENCODERS
+from core.config import DB_PATH
+
+try:
+    import resource
+except ImportError:
+    # Windows: no getrusage, so no RSS figures
+    resource = None
+
+TRANSACTION_FILTERS = {
+    "all types": {"transaction_type": "all"},
+    "debits": {"transaction_type": "debit"},
+    "groceries": {"category": "Groceries"},
+    # One of the least common merchants' categories
+    "insurance": {"category": "Insurance"},
+    "one year": {"start_date": "2024-01-01", "end_date": "2024-12-31"},
+    # The account id is looked up after loading
+    "one account": {"account": None},
+    "search": {"q": "tim hort"},
+}
+
+TRANSACTION_SORTS = {
+    "date desc": {"sort_by": "date", "sort_order": "desc"},
+    "amount asc": {"sort_by": "amount", "sort_order": "asc"},
+}
+
+TRANSACTION_PAGES = {
+    "first page": {"page": 1, "page_size": 100},
+    # The page number is filled in from the first page's total_pages
+    "last page": {"page": None, "page_size": 100},
+    "cursor": {"pagination": "cursor", "page_size": 100, "include_totals": "false"},
+    "10k rows": {"page": 1, "page_size": 10000},
+}
+
+CATEGORY_FILTERS = {
+    "debits": {},
+    "all types": {"transaction_type": "all"},
+    "one year": {"start_date": "2024-01-01", "end_date": "2024-12-31"},
+    "one account": {"account": None},
+}
+
+EXPORT_ENCODINGS = ["identity", "gzip"]
+
+# Results where a bigger number is an improvement; for the rest, smaller is
+HIGHER_IS_BETTER = ("rows_per_second", "mb_per_second")
+
+
+def reset_peak_rss() -> None:
+    """Start a new peak-RSS window, where the OS allows it (Linux).
+
+    Elsewhere the peak only ever grows, so each phase reports the highest
+    of itself and everything before it.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB everywhere else
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "encodings": ["gzip", *sorted(encoding for encoding in ENCODERS if encoding != "gzip")],
+    }
+
+
+def server_sql_ms(server_timing: str) -> Optional[float]:
+    for metric in server_timing.split(","):
+        name, *params = metric.strip().split(";")
+        if name == "sql":
+            for param in params:
+                if param.startswith("dur="):
+                    return float(param[4:])
+    return None
+
+
+def run_import(client: TestClient, csv_path: str, mode: str) -> dict:
+    reset_peak_rss()
+    response = client.post("/load-csv", params={"csv_path": csv_path, "mode": mode})
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+
+    while True:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            break
+        time.sleep(0.05)
+
+    if job["status"] != "succeeded":
+        raise RuntimeError(f"{mode} import failed: {job['error']}")
+
+    return {
+        "rows": job["rows_processed"],
+        # Measured by the job itself, so polling doesn't pad it
+        "seconds": job["elapsed_seconds"],
+        "rows_per_second": job["rows_per_second"],
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def measure(client: TestClient, path: str, params: dict, repeats: int) -> dict:
+    """Median latency of `repeats` uncached requests, plus one cache hit."""
+    seconds = []
+    sql_ms = []
+    for run in range(repeats):
+        started = time.perf_counter()
+        response = client.get(path, params={**params, "_run": run})
+        seconds.append(time.perf_counter() - started)
+        sql_ms.append(server_sql_ms(response.headers.get("server-timing", "")))
+
+    started = time.perf_counter()
+    client.get(path, params={**params, "_run": repeats - 1})
+    cached_seconds = time.perf_counter() - started
+
+    result = {
+        "status": response.status_code,
+        "bytes": len(response.content),
+        "median_ms": round(statistics.median(seconds) * 1000, 2),
+        "max_ms": round(max(seconds) * 1000, 2),
+        "cached_ms": round(cached_seconds * 1000, 2),
+    }
+    if None not in sql_ms:
+        result["sql_ms"] = round(statistics.median(sql_ms), 2)
+    return result
+
+
+def transaction_cases(account_id: int) -> Iterator[Tuple[str, dict]]:
+    for (filter_name, filters), (sort_name, sort), (page_name, page) in product(
+        TRANSACTION_FILTERS.items(), TRANSACTION_SORTS.items(), TRANSACTION_PAGES.items()
+    ):
+        params = {**filters, **sort, **page}
+        if "account" in params:
+            params["account"] = account_id
+        yield f"{filter_name} / {sort_name} / {page_name}", params
+
+
+def benchmark_transactions(client: TestClient, account_id: int, repeats: int) -> dict:
+    results = {}
+    for name, params in transaction_cases(account_id):
+        if params.get("page", 1) is None:
+            first = client.get("/transactions", params={**params, "page": 1})
+            params["page"] = first.json()["metadata"]["total_pages"] if first.status_code == 200 else 1
+        results[name] = measure(client, "/transactions", params, repeats)
+    return results
+
+
+def benchmark_categories(client: TestClient, account_id: int, repeats: int) -> dict:
+    results = {}
+    for name, filters in CATEGORY_FILTERS.items():
+        params = {**filters}
+        if "account" in params:
+            params["account"] = account_id
+        results[name] = measure(client, "/categories", params, repeats)
+    return results
+
+
+def benchmark_export(client: TestClient, rows: int) -> dict:
+    results = {}
+    for encoding in EXPORT_ENCODINGS:
+        reset_peak_rss()
+        started = time.perf_counter()
+        with client.stream(
+            "GET",
+            "/export-csv",
+            params={"transaction_type": "all", "_run": encoding},
+            headers={"Accept-Encoding": encoding},
+        ) as response:
+            size = sum(len(chunk) for chunk in response.iter_raw())
+        seconds = time.perf_counter() - started
+
+        results[encoding] = {
+            "status": response.status_code,
+            "bytes": size,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(rows / seconds),
+            "mb_per_second": round(size / seconds / 1e6, 1),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+    return results
+
+
+def benchmark_size(rows: int, seed: int, repeats: int) -> dict:
+    # Imported here so the app's pool opens the scratch database
+    from main import app
+
+    with tempfile.TemporaryDirectory() as workdir:
+        previous_cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            Path(DB_PATH).parent.mkdir()
+            csv_path = str(Path(workdir) / "synthetic.csv")
+            reset_peak_rss()
+            started = time.perf_counter()
+            write_synthetic_csv(csv_path, rows, seed)
+            generate = {
+                "seconds": round(time.perf_counter() - started, 3),
+                "bytes": os.path.getsize(csv_path),
+                "peak_rss_mb": peak_rss_mb(),
+            }
+
+            with TestClient(app) as client:
+                imports = {
+                    "replace": run_import(client, csv_path, "replace"),
+                    "append": run_import(client, csv_path, "append"),
+                }
+
+                account_id = client.get("/accounts").json()["accounts"][0]["id"]
+                reset_peak_rss()
+                transactions = benchmark_transactions(client, account_id, repeats)
+                categories = benchmark_categories(client, account_id, repeats)
+                queries_peak_rss_mb = peak_rss_mb()
+
+                export = benchmark_export(client, rows)
+
+                # Last, as it leaves the table as one long run of deletes
+                # and inserts rather than the bulk-loaded layout
+                imports["replace_accounts"] = run_import(client, csv_path, "replace_accounts")
+        finally:
+            os.chdir(previous_cwd)
+
+    return {
+        "rows": rows,
+        "generate": generate,
+        "import": imports,
+        "transactions": transactions,
+        "categories": categories,
+        "queries_peak_rss_mb": queries_peak_rss_mb,
+        "export": export,
+    }
+
+
+def flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    """Every number in `results`, keyed by its dotted path."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(baseline: dict, results: dict, threshold: float = 0.1) -> None:
+    """Print how each timing, throughput and RSS figure moved since `baseline`."""
+    before = {run["rows"]: run for run in baseline["runs"]}
+    for run in results["runs"]:
+        if run["rows"] not in before:
+            continue
+        print(f"\n{run['rows']:,} rows, against {baseline['environment']['commit']}")
+
+        old = flatten(before[run["rows"]])
+        for path, new_value in flatten(run).items():
+            metric = path.rsplit(".", 1)[-1]
+            if metric in ("status", "bytes", "rows") or not old.get(path):
+                continue
+            change = new_value / old[path] - 1
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = "  worse" if worse > threshold else "  better" if worse < -threshold else ""
+            print(f"  {path:<72} {old[path]:>12,.2f} -> {new_value:>12,.2f}  {change:+7.1%}{flag}")
+
+
+def main(sizes, seed: int, repeats: int, output: Optional[str], baseline: Optional[str]) -> None:
+    results = {
+        "environment": environment(),
+        "seed": seed,
+        "repeats": repeats,
+        "runs": [benchmark_size(rows, seed, repeats) for rows in sizes],
+    }
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if output:
+        Path(output).write_text(text + "\n")
+    else:
+        print(text)
+
+    if baseline:
+        compare(json.loads(Path(baseline).read_text()), results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON here instead of to stdout")
+    parser.add_argument("--baseline", help="Earlier --output to compare against")
+    args = parser.parse_args()
+
+    main(args.rows, args.seed, args.repeats, args.output, args.baseline)
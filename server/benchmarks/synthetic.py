@@ -0,0 +1,156 @@
+"""Synthetic RBC-format CSV exports for benchmarking.
+
+Run from server/:
+
+    python -m benchmarks.synthetic data/synthetic.csv --rows 1000000
+"""
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from models.enums import Category
+
+# (account type, account number) pairs, weighted towards the chequing account
+# the way a real household's activity is
+ACCOUNTS = [
+    ("Chequing", "01234-5678901"),
+    ("Savings", "01234-5678902"),
+    ("Visa", "4510123412341234"),
+    ("MasterCard", "5191123412345678"),
+]
+ACCOUNT_WEIGHTS = [0.45, 0.05, 0.35, 0.15]
+
+# Merchant stems and the category each one belongs to. Store numbers and
+# card suffixes are appended per row, as they are in real exports.
+MERCHANTS = [
+    ("LOBLAWS", Category.GROCERIES),
+    ("METRO", Category.GROCERIES),
+    ("STARBUCKS", Category.RESTAURANTS),
+    ("TIM HORTONS", Category.RESTAURANTS),
+    ("UBER TRIP", Category.TRANSPORTATION),
+    ("PETRO-CANADA", Category.TRANSPORTATION),
+    ("AMAZON.CA", Category.SHOPPING),
+    ("WINNERS", Category.SHOPPING),
+    ("CINEPLEX", Category.ENTERTAINMENT),
+    ("SHOPPERS DRUG MART", Category.HEALTHCARE),
+    ("HYDRO ONE", Category.UTILITIES),
+    ("BELL CANADA", Category.UTILITIES),
+    ("INTACT INSURANCE", Category.INSURANCE),
+    ("RENT PAYMENT", Category.HOUSING),
+    ("AIR CANADA", Category.TRAVEL),
+    ("NETFLIX.COM", Category.SUBSCRIPTIONS),
+    ("SPOTIFY", Category.SUBSCRIPTIONS),
+    ("E-TRANSFER", Category.TRANSFERS),
+    ("MISC PAYMENT", Category.OTHER),
+]
+
+# Rows generated and written per batch by write_synthetic_csv. A few million
+# rows at once would take gigabytes as a DataFrame of strings.
+WRITE_CHUNK_ROWS = 500_000
+
+CSV_COLUMNS = [
+    "Account Type",
+    "Account Number",
+    "Transaction Date",
+    "Cheque Number",
+    "Description 1",
+    "Description 2",
+    "CAD$",
+    "USD$",
+    "Category",
+]
+
+
+def generate_transactions(
+    rows: int,
+    seed: int = 0,
+    start: date = date(2015, 1, 1),
+    end: date = date(2025, 12, 31),
+) -> pd.DataFrame:
+    """A DataFrame shaped like an RBC export, with a Category column.
+
+    Merchants follow a Zipf-like distribution so a handful dominate, like a
+    real history of groceries and coffee. About one row in eight is a credit.
+    """
+    rng = np.random.default_rng(seed)
+
+    account_index = rng.choice(len(ACCOUNTS), size=rows, p=ACCOUNT_WEIGHTS)
+
+    ranks = np.arange(1, len(MERCHANTS) + 1)
+    merchant_weights = 1 / ranks
+    merchant_index = rng.choice(
+        len(MERCHANTS), size=rows, p=merchant_weights / merchant_weights.sum()
+    )
+
+    days = (end - start).days
+    # Sorted so the file reads oldest first, like a statement download
+    offsets = np.sort(rng.integers(0, days + 1, size=rows))
+    dates = pd.Timestamp(start) + pd.to_timedelta(offsets, unit="D")
+
+    is_credit = rng.random(rows) < 0.125
+    magnitudes = np.round(rng.lognormal(mean=3.5, sigma=1.0, size=rows), 2)
+    amounts = np.where(is_credit, magnitudes, -magnitudes)
+
+    stems = np.array([name for name, _ in MERCHANTS], dtype=object)[merchant_index]
+    store_numbers = rng.integers(1, 10000, size=rows).astype(str)
+    categories = np.array([category.value for _, category in MERCHANTS], dtype=object)[merchant_index]
+    # Credits are mostly refunds and transfers in, so they don't inherit the
+    # merchant's spending category as often
+    categories = np.where(is_credit & (rng.random(rows) < 0.5), Category.TRANSFERS.value, categories)
+
+    df = pd.DataFrame({
+        "Account Type": np.array([kind for kind, _ in ACCOUNTS], dtype=object)[account_index],
+        "Account Number": np.array([number for _, number in ACCOUNTS], dtype=object)[account_index],
+        # RBC's M/D/YYYY, without zero padding
+        "Transaction Date": (
+            dates.month.astype(str) + "/" + dates.day.astype(str) + "/" + dates.year.astype(str)
+        ),
+        "Cheque Number": "",
+        "Description 1": stems + " #" + store_numbers,
+        "Description 2": np.where(rng.random(rows) < 0.3, "POS PURCHASE", ""),
+        "CAD$": amounts,
+        "USD$": "",
+        "Category": categories,
+    })
+
+    return df[CSV_COLUMNS]
+
+
+def write_synthetic_csv(
+    path: str,
+    rows: int,
+    seed: int = 0,
+    start: date = date(2015, 1, 1),
+    end: date = date(2025, 12, 31),
+) -> str:
+    """Write `rows` transactions to `path`, WRITE_CHUNK_ROWS at a time.
+
+    Each batch gets its own slice of the date range, so the file still
+    reads oldest first, and memory stays flat however many rows are asked
+    for. A file that fits in one batch is exactly generate_transactions'.
+    """
+    batches = max(1, -(-rows // WRITE_CHUNK_ROWS))
+    days = (end - start).days + 1
+
+    for batch in range(batches):
+        first_day = start + timedelta(days=days * batch // batches)
+        last_day = start + timedelta(days=days * (batch + 1) // batches - 1)
+        batch_rows = rows * (batch + 1) // batches - rows * batch // batches
+
+        generate_transactions(batch_rows, seed=seed + batch, start=first_day, end=last_day).to_csv(
+            path, mode="w" if batch == 0 else "a", header=batch == 0, index=False
+        )
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_synthetic_csv(args.path, args.rows, args.seed)
+    print(f"Wrote {args.rows} transactions to {args.path}")
@@ -0,0 +1,129 @@
+import hashlib
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+
+from fastapi import Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from core.config import RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_MAX_ENTRY_BYTES
+from db.version import data_version
+
+# Read endpoints whose body depends only on the query string and the data.
+# Prefixes, so /insights/monthly etc. are all covered.
+CACHED_PATHS = ("/transactions", "/categories", "/export-csv", "/insights/")
+
+# Replayed with a cached body; everything else is regenerated
+CACHED_HEADERS = ("content-type", "content-disposition")
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    headers: Dict[str, str]
+
+
+class ResponseCache:
+    """LRU of response bodies, bounded by total size rather than count.
+
+    Only touched from the event loop (by the middleware below), so it
+    needs no lock.
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._size = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key).body)
+        self._entries[key] = entry
+        self._size += len(entry.body)
+
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.body)
+
+
+def response_etag(request: Request) -> str:
+    """ETag for what this request would return against the current data.
+
+    Derived from the path, the query parameters (sorted, so their order in
+    the URL doesn't matter) and the data version, so it's known before
+    running any query and a matching If-None-Match costs nothing.
+    """
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    key = f"{data_version.current()}|{request.url.path}?{query}"
+    return '"' + hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # Comparison is weak per RFC 9110, so W/"x" matches "x"
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """Serve repeat GETs of the read endpoints from memory, or as a 304.
+
+    The frontend refetches /categories and /transactions on every filter
+    toggle and after every edit, mostly asking for something it has seen
+    before. Every write bumps data_version, which changes every ETag and
+    cache key at once, so nothing stale is ever served.
+    """
+
+    def __init__(self, app, cache: Optional[ResponseCache] = None):
+        super().__init__(app)
+        self.cache = cache or ResponseCache()
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method != "GET" or not request.url.path.startswith(CACHED_PATHS):
+            return await call_next(request)
+
+        etag = response_etag(request)
+        # no-cache: the browser may keep the body, but must check the ETag
+        # with us before reusing it
+        validators = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=validators)
+
+        cached = self.cache.get(etag)
+        if cached is not None:
+            return Response(content=cached.body, headers={**cached.headers, **validators})
+
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+
+        response.headers.update(validators)
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        response.body_iterator = self._capture(etag, headers, response.body_iterator)
+        return response
+
+    async def _capture(self, key: str, headers: Dict[str, str], body_iterator):
+        """Pass the body through unchanged, keeping a copy if it's small enough."""
+        chunks = []
+        size = 0
+        for_cache = True
+
+        async for chunk in body_iterator:
+            if for_cache:
+                size += len(chunk)
+                if size > RESPONSE_CACHE_MAX_ENTRY_BYTES:
+                    for_cache = False
+                    chunks = []
+                else:
+                    chunks.append(chunk)
+            yield chunk
+
+        if for_cache:
+            self.cache.put(key, CachedResponse(b"".join(chunks), headers))
@@ -0,0 +1,183 @@
+import zlib
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import BROTLI_QUALITY, COMPRESSION_MIN_BYTES, GZIP_LEVEL, ZSTD_LEVEL
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# JSON pages, CSV exports and the columnar formats. Anything else (and
+# anything already carrying a Content-Encoding) is passed through as-is.
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "text/",
+    "application/msgpack",
+    "application/vnd.apache.arrow.stream",
+)
+
+
+class GzipEncoder:
+    def __init__(self):
+        # wbits 16 + MAX_WBITS writes the gzip header and trailer
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes, final: bool) -> bytes:
+        flush_mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(chunk) + self._compressor.flush(flush_mode)
+
+
+class BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, chunk: bytes, final: bool) -> bytes:
+        data = self._compressor.process(chunk)
+        return data + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, chunk: bytes, final: bool) -> bytes:
+        flush_mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._compressor.compress(chunk) + self._compressor.flush(flush_mode)
+
+
+# Content-Encoding -> encoder, in order of preference when the client
+# accepts several equally. brotli and zstandard are optional installs.
+ENCODERS: Dict[str, type] = {
+    **({"zstd": ZstdEncoder} if zstandard is not None else {}),
+    **({"br": BrotliEncoder} if brotli is not None else {}),
+    "gzip": GzipEncoder,
+}
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """The encoding to use for an Accept-Encoding header, or None for identity.
+
+    Highest q-value wins; ties go to the first in ENCODERS.
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.split(";")
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    best = None
+    best_weight = 0.0
+    for encoding in ENCODERS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts.
+
+    Like Starlette's GZipMiddleware, but negotiating between gzip, brotli
+    and zstd. A body that arrives in one message is compressed whole if it's
+    at least `minimum_size`. A streamed one (the CSV export) is compressed
+    and flushed a chunk at a time, so it still streams and is never buffered.
+
+    Goes outside ResponseCacheMiddleware, which therefore keeps one
+    uncompressed copy per response rather than one per encoding. A
+    compressed body no longer matches its strong ETag byte for byte, so
+    the ETag is sent weak; the cache's If-None-Match check accepts either.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        responder = _CompressingSender(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder)
+
+
+class _CompressingSender:
+    """The `send` handed to the app for one request."""
+
+    def __init__(self, send: Send, encoding: Optional[str], minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.encoder = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows whether to compress
+            self.start_message = message
+        elif self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            await self._start(start_message, message)
+        elif self.encoder is not None:
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if body or not more_body:
+                message["body"] = self.encoder.compress(body, final=not more_body)
+            await self.send(message)
+        else:
+            await self.send(message)
+
+    async def _start(self, start_message: Message, message: Message) -> None:
+        if message["type"] != "http.response.body":
+            # pathsend and the like carry no body to compress
+            await self.send(start_message)
+            await self.send(message)
+            return
+
+        headers = MutableHeaders(raw=start_message["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        compressible = (
+            "content-encoding" not in headers
+            and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+        )
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+
+        if not compressible or self.encoding is None or (not more_body and len(body) < self.minimum_size):
+            await self.send(start_message)
+            await self.send(message)
+            return
+
+        self.encoder = ENCODERS[self.encoding]()
+        headers["Content-Encoding"] = self.encoding
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+
+        message["body"] = self.encoder.compress(body, final=not more_body)
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(message["body"]))
+
+        await self.send(start_message)
+        await self.send(message)
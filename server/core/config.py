@@ -1 +1,61 @@
 DB_PATH = "data/transactions.db"
+
+# Connections kept open by the pool in db/database.py. Enough for the
+# dashboard's parallel reads plus a concurrent CSV load.
+DB_POOL_SIZE = 8
+
+# Threads that run the (synchronous) route handlers and CSV loads. A long
+# import or export occupies one of these, so the rest keep serving the
+# dashboard. Matches the pool so every worker normally finds a warm connection.
+DB_WORKER_THREADS = DB_POOL_SIZE
+
+# Prepared statements cached per connection. The route queries are built from
+# a small set of filter combinations, so this comfortably holds all of them.
+DB_STATEMENT_CACHE_SIZE = 256
+
+# Negative cache_size is in KiB, so this is a 64 MiB page cache per connection
+DB_CACHE_SIZE_KIB = 64 * 1024
+
+DB_MMAP_SIZE_BYTES = 256 * 1024 * 1024
+
+# How long a connection waits on a lock held by another writer before failing
+DB_BUSY_TIMEOUT_SECONDS = 5.0
+
+# Rows parsed and inserted per batch when loading a CSV. Bounds the loader's
+# memory regardless of file size.
+CSV_CHUNK_ROWS = 50_000
+
+# Imports run in the background (core/jobs.py) on their own threads. Each one
+# is a single write transaction, and SQLite allows one writer at a time, so a
+# second worker would only sit waiting on the first one's lock.
+IMPORT_WORKERS = 1
+
+# Finished import jobs kept around for /jobs/{id}; the oldest are forgotten first
+IMPORT_JOB_HISTORY = 50
+
+# In-memory cache of GET responses (core/cache.py). Entries for a data
+# version that's been superseded are never hit again and age out of the LRU.
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Bigger bodies (a huge page_size, a full export) are served but not kept,
+# so one of them can't push everything else out
+RESPONSE_CACHE_MAX_ENTRY_BYTES = 4 * 1024 * 1024
+
+# Bodies smaller than this go out uncompressed (core/compression.py): the
+# bytes saved on a short reply don't pay for compressing it
+COMPRESSION_MIN_BYTES = 1024
+
+# Responses are compressed as they're sent, not once ahead of time, so these
+# are the fast end of each codec's range rather than its best ratio
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+# Upper bounds, in seconds, of the request latency histogram on /metrics
+# (core/metrics.py)
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# SQLite VM instructions between progress-handler calls on pooled
+# connections (db/profiling.py), i.e. the granularity of the VM step counts.
+# Each call is a trip into Python, so much lower slows down large scans.
+SQL_PROGRESS_STEPS = 10_000
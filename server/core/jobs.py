@@ -0,0 +1,133 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request
+
+from core.config import IMPORT_JOB_HISTORY, IMPORT_WORKERS
+from db.database import ConnectionPool, init_db
+from db.loaders import LoadResult, load_csv_to_db
+from models.enums import ImportMode, JobStatus
+
+
+class ImportJob:
+    """One CSV import, as seen by /jobs/{id} while it runs and after."""
+
+    def __init__(self, csv_path: str, mode: ImportMode, filename: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.csv_path = csv_path
+        self.mode = mode
+        self.filename = filename
+        self.status = JobStatus.QUEUED
+        self.rows_processed = 0
+        self.result: Optional[LoadResult] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        elapsed = None
+        rows_per_second = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            if elapsed > 0:
+                rows_per_second = round(self.rows_processed / elapsed)
+
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "mode": self.mode,
+            "filename": self.filename,
+            "rows_processed": self.rows_processed,
+            "elapsed_seconds": round(elapsed, 3) if elapsed is not None else None,
+            "rows_per_second": rows_per_second,
+            "error": self.error,
+        }
+
+
+class ImportJobs:
+    """Runs CSV imports off the request path and remembers how they went.
+
+    A large file can take longer to load than a browser or proxy will wait on
+    one HTTP call, so the routes only queue the work and hand back a job id;
+    the client polls /jobs/{id} for progress. Jobs live in memory: a restart
+    forgets them, and an import interrupted by one is rolled back by SQLite.
+    """
+
+    def __init__(self, pool: ConnectionPool, workers: int = IMPORT_WORKERS):
+        self.pool = pool
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import")
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        csv_path: str,
+        mode: ImportMode,
+        filename: Optional[str] = None,
+        delete_when_done: bool = False,
+    ) -> ImportJob:
+        """Queue `csv_path` for loading. With `delete_when_done`, the file is
+        deleted once the job ends either way, as uploads shouldn't pile up in
+        data/; the caller makes sure no other job is given the same path."""
+        job = ImportJob(csv_path, mode, filename)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._forget_old_jobs()
+        self._executor.submit(self._run, job, delete_when_done)
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        # Drop queued imports, but let a running one commit or roll back
+        # before the pool closes its connection
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self, job: ImportJob, delete_when_done: bool) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+
+        def on_progress(rows: int) -> None:
+            job.rows_processed = rows
+
+        try:
+            with self.pool.connection() as conn:
+                init_db(conn)
+                job.result = load_csv_to_db(job.csv_path, conn, job.mode, on_progress)
+        except Exception as e:
+            job.error = str(e)
+        finally:
+            # Loaded or not, the rows are in the database or never will be
+            if delete_when_done:
+                Path(job.csv_path).unlink(missing_ok=True)
+
+        # Status last, so a poller that sees the job finished also sees
+        # its final row count and timing
+        job.finished_at = time.time()
+        if job.result:
+            job.rows_processed = job.result.rows
+            job.status = JobStatus.SUCCEEDED
+        else:
+            job.status = JobStatus.FAILED
+
+    def _forget_old_jobs(self) -> None:
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+        ]
+        # Unfinished jobs are never dropped: someone is still waiting on them
+        for job_id in finished[:max(0, len(finished) - IMPORT_JOB_HISTORY)]:
+            del self._jobs[job_id]
+
+
+def get_import_jobs(request: Request) -> ImportJobs:
+    """FastAPI dependency for the app's import job runner."""
+    return request.app.state.import_jobs
@@ -1,10 +1,29 @@
 from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI
 
-from db.database import init_db
+from core.config import DB_PATH, DB_WORKER_THREADS
+from core.jobs import ImportJobs
+from db.database import ConnectionPool, init_db
 
 
 @asynccontextmanager
-async def lifespan(_: FastAPI):
-    init_db()
-    yield
+async def lifespan(app: FastAPI):
+    # Sync handlers run on anyio's default thread pool, so sizing its limiter
+    # bounds how much blocking SQLite/pandas work can run at once
+    to_thread.current_default_thread_limiter().total_tokens = DB_WORKER_THREADS
+
+    pool = ConnectionPool(DB_PATH)
+    with pool.connection() as conn:
+        init_db(conn)
+
+    jobs = ImportJobs(pool)
+
+    app.state.db_pool = pool
+    app.state.import_jobs = jobs
+    try:
+        yield
+    finally:
+        jobs.shutdown()
+        pool.close()
@@ -0,0 +1,226 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import REQUEST_LATENCY_BUCKETS
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class StatementStats:
+    """What one SQL statement has cost, summed over its executions."""
+
+    __slots__ = ("executions", "seconds", "rows", "vm_steps")
+
+    def __init__(self):
+        self.executions = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.vm_steps = 0
+
+    def add(self, other: "StatementStats") -> None:
+        self.executions += other.executions
+        self.seconds += other.seconds
+        self.rows += other.rows
+        self.vm_steps += other.vm_steps
+
+
+class RequestProfile:
+    """The SQL run on behalf of one request, filled in by db/profiling.py.
+
+    Only ever touched by one thread at a time: a request's dependency,
+    handler and streamed body may run on different worker threads, but
+    never at once.
+    """
+
+    def __init__(self):
+        self.statements: Dict[str, StatementStats] = {}
+        self.sql_seconds = 0.0
+
+    def record(self, statement: str, seconds: float, rows: int, vm_steps: int, executions: int) -> None:
+        stats = self.statements.get(statement)
+        if stats is None:
+            stats = self.statements[statement] = StatementStats()
+        stats.executions += executions
+        stats.seconds += seconds
+        stats.rows += rows
+        stats.vm_steps += vm_steps
+        self.sql_seconds += seconds
+
+    def server_timing(self, elapsed: float) -> str:
+        executions = sum(stats.executions for stats in self.statements.values())
+        rows = sum(stats.rows for stats in self.statements.values())
+        return (
+            f'sql;dur={self.sql_seconds * 1000:.1f};desc="{executions} statements, {rows} rows", '
+            f"total;dur={elapsed * 1000:.1f}"
+        )
+
+
+# The request being served, if any. Set by MetricsMiddleware; Starlette runs
+# sync handlers and streamed bodies in worker threads under a copy of the
+# request's context, so the connections they use find the same profile.
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, buckets: int):
+        # One slot per bucket plus +Inf; cumulated only when rendered
+        self.counts = [0] * (buckets + 1)
+        self.total = 0.0
+        self.count = 0
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class Metrics:
+    """Process-wide counters behind /metrics.
+
+    Requests are added whole, once their response has been sent, so the
+    lock is taken once per request rather than once per SQL statement.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = REQUEST_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self._response_bytes: Dict[Tuple[str, str], int] = {}
+        self._statements: Dict[Tuple[str, str], StatementStats] = {}
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        response_bytes: int,
+        profile: RequestProfile,
+    ) -> None:
+        with self._lock:
+            histogram = self._latency.get((method, route, str(status)))
+            if histogram is None:
+                histogram = self._latency[(method, route, str(status))] = Histogram(len(self.buckets))
+            histogram.counts[bisect_left(self.buckets, seconds)] += 1
+            histogram.total += seconds
+            histogram.count += 1
+
+            self._response_bytes[(method, route)] = self._response_bytes.get((method, route), 0) + response_bytes
+
+            for statement, stats in profile.statements.items():
+                totals = self._statements.get((route, statement))
+                if totals is None:
+                    totals = self._statements[(route, statement)] = StatementStats()
+                totals.add(stats)
+
+    def render(self) -> str:
+        """Everything recorded so far, in the Prometheus text format."""
+        with self._lock:
+            return "".join(f"{line}\n" for line in self._lines())
+
+    def _lines(self) -> Iterator[str]:
+        yield "# HELP http_request_duration_seconds Time from receiving a request to sending the last byte of its response."
+        yield "# TYPE http_request_duration_seconds histogram"
+        for (method, route, status), histogram in sorted(self._latency.items()):
+            cumulative = 0
+            bounds: List[str] = [repr(bound) for bound in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, histogram.counts):
+                cumulative += count
+                labels = _labels(method=method, route=route, status=status, le=bound)
+                yield f"http_request_duration_seconds_bucket{labels} {cumulative}"
+            labels = _labels(method=method, route=route, status=status)
+            yield f"http_request_duration_seconds_sum{labels} {histogram.total!r}"
+            yield f"http_request_duration_seconds_count{labels} {histogram.count}"
+
+        yield "# HELP http_response_bytes_total Response body bytes sent, after compression."
+        yield "# TYPE http_response_bytes_total counter"
+        for (method, route), total in sorted(self._response_bytes.items()):
+            yield f"http_response_bytes_total{_labels(method=method, route=route)} {total}"
+
+        series = [
+            ("sqlite_statements_total", "Executions of each SQL statement, by route.", "executions"),
+            ("sqlite_statement_seconds_total", "Time spent executing and fetching each SQL statement, by route.", "seconds"),
+            ("sqlite_rows_total", "Rows fetched from each SQL statement, by route.", "rows"),
+            (
+                "sqlite_vm_steps_total",
+                "SQLite VM instructions run for each SQL statement, by route, to the nearest SQL_PROGRESS_STEPS.",
+                "vm_steps",
+            ),
+        ]
+        for name, description, field in series:
+            yield f"# HELP {name} {description}"
+            yield f"# TYPE {name} counter"
+            for (route, statement), stats in sorted(self._statements.items()):
+                value = getattr(stats, field)
+                yield f"{name}{_labels(route=route, statement=statement)} {value!r}"
+
+
+metrics = Metrics()
+
+
+def route_template(scope: Scope) -> str:
+    """The path template of the route that will serve this request, e.g.
+    /transactions/{transaction_id}/category, so every id shares one label."""
+    router = getattr(scope.get("app"), "router", None)
+    for route in getattr(router, "routes", []):
+        match, _ = route.matches(scope)
+        if match != Match.NONE:
+            return route.path
+    # Anything a scanner tries shares this one, rather than a label each
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Times every request and the SQL run for it, for /metrics and the
+    Server-Timing header.
+
+    Outermost, so the time includes the cache, compression and CORS layers
+    and the byte counts are what went over the wire. Server-Timing has to
+    go out with the headers, so for a streamed export it covers the time to
+    the first chunk; /metrics gets the whole response.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope)
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        status = 500
+        response_bytes = 0
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", profile.server_timing(time.perf_counter() - start))
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
+            metrics.observe(
+                scope["method"], route, status, time.perf_counter() - start, response_bytes, profile
+            )
@@ -0,0 +1,84 @@
+import sqlite3
+from typing import Dict, Tuple
+
+import pandas as pd
+
+# One row per card or bank account, identified the way the RBC export does.
+# transactions.account_id points here, so filtering on an account or
+# replacing one compares a single small integer.
+#
+# AUTOINCREMENT so an id /accounts has handed out never comes back as a
+# different account once the first one's transactions are gone.
+CREATE_ACCOUNTS = """
+    CREATE TABLE IF NOT EXISTS accounts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        account_type TEXT NOT NULL,
+        account_number TEXT NOT NULL,
+        UNIQUE (account_type, account_number)
+    )
+"""
+
+
+def _key_sql(column: str) -> str:
+    return f"COALESCE(TRIM({column}), '')"
+
+
+# transactions.account_id for a row of a table that predates the column
+ACCOUNT_ID_SQL = f"""(
+    SELECT accounts.id FROM accounts
+    WHERE accounts.account_type = {_key_sql("transactions.account_type")}
+      AND accounts.account_number = {_key_sql("transactions.account_number")}
+)"""
+
+
+def _key(values: pd.Series) -> pd.Series:
+    # Matches _key_sql, so a CSV row and a stored row find the same account
+    return values.fillna("").astype(str).str.strip()
+
+
+def create_accounts(cursor: sqlite3.Cursor) -> None:
+    """Create the accounts table if missing, filled from the transactions
+    already loaded, numbered in the order they first appear."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'accounts'")
+    if cursor.fetchone():
+        return
+
+    cursor.execute(CREATE_ACCOUNTS)
+    cursor.execute(
+        f"""
+        INSERT INTO accounts (account_type, account_number)
+        SELECT {_key_sql("account_type")}, {_key_sql("account_number")}
+        FROM transactions
+        GROUP BY 1, 2
+        ORDER BY MIN(id)
+        """
+    )
+
+
+def account_ids(cursor: sqlite3.Cursor, account_types: pd.Series, account_numbers: pd.Series) -> pd.Series:
+    """accounts.id for each row, adding any account not seen before."""
+    keys = list(zip(_key(account_types), _key(account_numbers)))
+
+    # A statement covers a handful of accounts, so one lookup each is cheap.
+    # Looked up before inserting: an ignored INSERT would still use up an id.
+    ids: Dict[Tuple[str, str], int] = {}
+    for key in dict.fromkeys(keys):
+        cursor.execute("SELECT id FROM accounts WHERE account_type = ? AND account_number = ?", key)
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute("INSERT INTO accounts (account_type, account_number) VALUES (?, ?)", key)
+            ids[key] = cursor.lastrowid
+        else:
+            ids[key] = row[0]
+
+    return pd.Series([ids[key] for key in keys], index=account_types.index, dtype="int64")
+
+
+def prune_accounts(cursor: sqlite3.Cursor) -> None:
+    """Forget accounts whose every transaction has been replaced away."""
+    cursor.execute(
+        """
+        DELETE FROM accounts
+        WHERE NOT EXISTS (SELECT 1 FROM transactions WHERE account_id = accounts.id)
+        """
+    )
@@ -0,0 +1,47 @@
+from typing import Dict
+
+from models.enums import Category
+
+# How each category is stored in transactions.category_code. These numbers
+# are written to disk: never renumber or reuse one. A new category gets the
+# next number, and run_migrations regenerates the `category` column for it.
+CATEGORY_CODES: Dict[Category, int] = {
+    Category.ENTERTAINMENT: 1,
+    Category.GROCERIES: 2,
+    Category.HEALTHCARE: 3,
+    Category.HOUSING: 4,
+    Category.INSURANCE: 5,
+    Category.OTHER: 6,
+    Category.RESTAURANTS: 7,
+    Category.SHOPPING: 8,
+    Category.SUBSCRIPTIONS: 9,
+    Category.TRANSFERS: 10,
+    Category.TRANSPORTATION: 11,
+    Category.TRAVEL: 12,
+    Category.UTILITIES: 13,
+}
+
+CODE_CATEGORIES: Dict[int, Category] = {code: category for category, code in CATEGORY_CODES.items()}
+
+# Codes for what an export's Category column may say: the category names the
+# routes use, or the longer descriptions scripts/rbc_categorizer.py writes
+LABEL_CODES: Dict[str, int] = {
+    **{category.description: code for category, code in CATEGORY_CODES.items()},
+    **{category.value: code for category, code in CATEGORY_CODES.items()},
+}
+
+# Anything else (blank, misspelled) is stored as Other, where it shows up
+# in the app and can be recategorized, rather than failing the whole load
+FALLBACK_CODE = CATEGORY_CODES[Category.OTHER]
+
+
+def category_name_sql(code_column: str) -> str:
+    """SQL turning a category code back into its name."""
+    cases = " ".join(f"WHEN {code} THEN '{category.value}'" for code, category in CODE_CATEGORIES.items())
+    return f"CASE {code_column} {cases} END"
+
+
+def category_code_sql(label_column: str) -> str:
+    """SQL giving the code for a category label, the way the loader assigns it."""
+    cases = " ".join(f"WHEN '{label}' THEN {code}" for label, code in LABEL_CODES.items())
+    return f"CASE {label_column} {cases} ELSE {FALLBACK_CODE} END"
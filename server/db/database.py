@@ -1,31 +1,223 @@
+import queue
 import sqlite3
-from core.config import DB_PATH
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
 
+import pandas as pd
+from fastapi import Request
+
+from core.config import (
+    DB_BUSY_TIMEOUT_SECONDS,
+    DB_CACHE_SIZE_KIB,
+    DB_MMAP_SIZE_BYTES,
+    DB_POOL_SIZE,
+    DB_STATEMENT_CACHE_SIZE,
+)
+from db.accounts import ACCOUNT_ID_SQL, create_accounts
+from db.categories import category_code_sql, category_name_sql
+from db.fingerprints import FINGERPRINT_COLUMNS, transaction_fingerprints
+from db.merchants import normalize_merchants
+from db.profiling import ProfiledConnection
+from db.rollups import create_rollups
+from db.search import create_search_index
+
+
+class ConnectionPool:
+    """A fixed-size set of long-lived SQLite connections shared by the routes.
+
+    Opening a connection per request throws away SQLite's page cache and the
+    per-connection prepared-statement cache every time. Keeping them open
+    means repeat queries hit warm pages and already-compiled statements.
+    """
+
+    def __init__(self, db_path: str, size: int = DB_POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=DB_BUSY_TIMEOUT_SECONDS,
+            cached_statements=DB_STATEMENT_CACHE_SIZE,
+            # A connection is only ever used by one request at a time, but
+            # that request may be served from a different thread than the
+            # one that opened it
+            check_same_thread=False,
+            # Times each statement for /metrics and Server-Timing
+            factory=ProfiledConnection,
+        )
+        conn.row_factory = sqlite3.Row
+
+        # WAL lets readers keep going while a PATCH or CSV load is writing,
+        # and NORMAL sync is still crash-safe in WAL mode
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KIB}")
+        conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE_BYTES}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection, opening a new one if none are idle.
+
+        Never blocks waiting for a connection to come back: handlers run on
+        worker threads, and a thread parked here could be holding the very
+        slot the connection's current borrower needs to finish. Past `size`,
+        the extra connection is closed on return instead of being kept.
+        """
+        try:
+            conn = self._idle.get_nowait()
+            pooled = True
+        except queue.Empty:
+            with self._lock:
+                pooled = self._opened < self.size
+                if pooled:
+                    self._opened += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                if pooled:
+                    with self._lock:
+                        self._opened -= 1
+                raise
+
+        try:
+            yield conn
+        finally:
+            # Never hand the next borrower a half-finished transaction
+            if conn.in_transaction:
+                conn.rollback()
+            if pooled:
+                self._idle.put(conn)
+            else:
+                conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+
+def get_db(request: Request) -> Iterator[sqlite3.Connection]:
+    """FastAPI dependency yielding a pooled connection for one request."""
+    with request.app.state.db_pool.connection() as conn:
+        yield conn
+
+
+# Secondary indexes on transactions, by name. Each one is shaped after a query
+# in the routes: the equality filter (category) leads, then the range/sort
+# column, then whatever the query reads, so SQLite can answer from the index
+# without touching the table. run_migrations keeps the database in line with
+# this mapping, so changing an entry rebuilds that index on next start.
+#
+# The date indexes carry id straight after day: cursor pages order by
+# (day, id), and with id further back SQLite has to sort every match,
+# which makes it prefer the category/amount index and sort that instead.
+# The amount indexes end in the rowid anyway, so are already in that order.
+TRANSACTION_INDEXES: Dict[str, Tuple[str, ...]] = {
+    # /transactions for one category, sorted by date, plus its COUNT/SUM
+    "idx_transactions_category_date": ("category_code", "day", "id", "amount_cents"),
+    # /transactions for one category, sorted by amount
+    "idx_transactions_category_amount": ("category_code", "amount_cents"),
+    # "All" categories by date. Everything the daily_totals rollup groups or
+    # sums on rides along, so rebuilding it after a load is one index scan.
+    "idx_transactions_date": ("day", "id", "amount_cents", "category_code", "is_reimbursed", "account_id"),
+    # One account's transactions by date, with category checked in the
+    # index. Also what per-account replacement deletes through.
+    "idx_transactions_account_date": ("account_id", "day", "id", "amount_cents", "category_code"),
+    # "All" categories sorted by amount; also serves the debit/credit range
+    "idx_transactions_amount": ("amount_cents",),
+    # Per-merchant grouping and history, in date order within a merchant
+    "idx_transactions_merchant": ("merchant", "day", "amount_cents"),
+}
+
+FINGERPRINT_INDEX = "uq_transactions_fingerprint"
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
 
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS transactions (
+def create_transactions_sql(table: str) -> str:
+    """The transactions table, as stored: amounts as whole cents, dates as
+    Julian day numbers and categories as db/categories.py codes, which keeps
+    rows and index entries small and sums exact.
+
+    transaction_date, cad_amount, usd_amount and category are generated
+    from those, so every SELECT still reads the values exports and the API
+    deal in. Writes and WHERE clauses go through the stored columns.
+    """
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             account_type TEXT,
             account_number TEXT,
-            transaction_date TEXT,
+            -- accounts.id for account_type and account_number (db/accounts.py)
+            account_id INTEGER NOT NULL,
+            -- 0 when the export's date didn't parse; it's kept in unparsed_date
+            day INTEGER NOT NULL DEFAULT 0,
+            unparsed_date TEXT,
             cheque_number TEXT,
             description_1 TEXT,
             description_2 TEXT,
-            cad_amount REAL,
-            usd_amount REAL,
-            category TEXT,
-            is_reimbursed INTEGER NOT NULL DEFAULT 0
+            amount_cents INTEGER,
+            usd_cents INTEGER,
+            category_code INTEGER NOT NULL,
+            is_reimbursed INTEGER NOT NULL DEFAULT 0,
+            fingerprint TEXT,
+            merchant TEXT,
+            transaction_date TEXT GENERATED ALWAYS AS (
+                CASE WHEN day > 0 THEN date(day) ELSE unparsed_date END
+            ) VIRTUAL,
+            cad_amount REAL GENERATED ALWAYS AS (amount_cents / 100.0) VIRTUAL,
+            usd_amount REAL GENERATED ALWAYS AS (usd_cents / 100.0) VIRTUAL,
+            category TEXT GENERATED ALWAYS AS ({category_name_sql("category_code")}) VIRTUAL
         )
-    """)
+    """
+
+
+# The columns create_transactions_sql actually stores, in order
+STORED_COLUMNS = [
+    "id", "account_type", "account_number", "account_id", "day", "unparsed_date", "cheque_number",
+    "description_1", "description_2", "amount_cents", "usd_cents", "category_code",
+    "is_reimbursed", "fingerprint", "merchant",
+]
+
+
+def _cents_sql(column: str) -> str:
+    return f"CASE WHEN typeof({column}) IN ('integer', 'real') THEN CAST(round({column} * 100) AS INTEGER) END"
+
+
+_IS_ISO_DATE = "date(transaction_date) = transaction_date"
+
+# Stored columns an older table lacks, computed from what it has: dates as
+# text, amounts as REAL, categories as free text, no account ids. Converted
+# the way db/loaders.py converts a CSV, so an upgraded database matches a
+# freshly loaded one.
+LEGACY_COLUMNS = {
+    "account_id": ACCOUNT_ID_SQL,
+    "day": f"CASE WHEN {_IS_ISO_DATE} THEN CAST(julianday(transaction_date) + 0.5 AS INTEGER) ELSE 0 END",
+    "unparsed_date": f"CASE WHEN {_IS_ISO_DATE} THEN NULL ELSE transaction_date END",
+    "amount_cents": _cents_sql("cad_amount"),
+    "usd_cents": _cents_sql("usd_amount"),
+    "category_code": category_code_sql("category"),
+}
+
+
+def init_db(conn: sqlite3.Connection):
+    cursor = conn.cursor()
+
+    cursor.execute(create_transactions_sql("transactions"))
 
     run_migrations(cursor)
 
     conn.commit()
-    conn.close()
 
 
 def run_migrations(cursor: sqlite3.Cursor) -> None:
@@ -43,3 +235,148 @@ def run_migrations(cursor: sqlite3.Cursor) -> None:
         cursor.execute(
             "ALTER TABLE transactions ADD COLUMN is_reimbursed INTEGER NOT NULL DEFAULT 0"
         )
+
+    if "fingerprint" not in existing_columns:
+        cursor.execute("ALTER TABLE transactions ADD COLUMN fingerprint TEXT")
+        backfill_fingerprints(cursor)
+
+    if "merchant" not in existing_columns:
+        cursor.execute("ALTER TABLE transactions ADD COLUMN merchant TEXT")
+        backfill_merchants(cursor)
+
+    # Before any rebuild, which looks up each row's account in it
+    create_accounts(cursor)
+
+    if table_definition(cursor, "transactions") != table_definition_of(create_transactions_sql("transactions")):
+        # Stored columns are new, or the category column's CASE is missing
+        # a category added since; either way only a rebuild helps
+        rebuild_transactions_table(cursor)
+
+    # Unique, so an append-mode import can skip rows it has already seen
+    # with INSERT OR IGNORE instead of checking each one first
+    cursor.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {FINGERPRINT_INDEX} ON transactions (fingerprint)"
+    )
+
+    sync_indexes(cursor)
+    create_rollups(cursor)
+    create_search_index(cursor)
+
+
+def table_definition_of(create_sql: str) -> str:
+    """The column list of a CREATE TABLE, whitespace-normalized.
+
+    Skips the table name, which SQLite rewrites (and quotes) on a rename.
+    """
+    return " ".join(create_sql[create_sql.index("("):].split())
+
+
+def table_definition(cursor: sqlite3.Cursor, table: str) -> str:
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return table_definition_of(cursor.fetchone()[0])
+
+
+def rebuild_transactions_table(cursor: sqlite3.Cursor) -> None:
+    """Copy transactions into a table created from create_transactions_sql.
+
+    SQLite can't change a column's type or make it generated in place. Ids
+    are kept, so the search index and anything holding an id stay valid.
+    Indexes and triggers go with the old table; the rest of run_migrations
+    recreates them.
+    """
+    # Generated columns aren't listed here, only what the table stores
+    cursor.execute("PRAGMA table_info(transactions)")
+    existing_columns = {row[1] for row in cursor.fetchall()}
+
+    columns = ", ".join(STORED_COLUMNS)
+    values = ", ".join(
+        column if column in existing_columns else LEGACY_COLUMNS[column] for column in STORED_COLUMNS
+    )
+
+    cursor.execute("DROP TABLE IF EXISTS transactions_rebuild")
+    cursor.execute(create_transactions_sql("transactions_rebuild"))
+    cursor.execute(f"INSERT INTO transactions_rebuild ({columns}) SELECT {values} FROM transactions")
+    cursor.execute("DROP TABLE transactions")
+    cursor.execute("ALTER TABLE transactions_rebuild RENAME TO transactions")
+
+
+def backfill_fingerprints(cursor: sqlite3.Cursor) -> None:
+    """Fingerprint rows loaded before the column existed, in load order."""
+    cursor.execute(f"SELECT id, {', '.join(FINGERPRINT_COLUMNS)} FROM transactions ORDER BY id")
+    rows = cursor.fetchall()
+    if not rows:
+        return
+
+    df = pd.DataFrame([tuple(row) for row in rows], columns=["id", *FINGERPRINT_COLUMNS])
+    fingerprints = transaction_fingerprints(df)
+
+    cursor.executemany(
+        "UPDATE transactions SET fingerprint = ? WHERE id = ?",
+        zip(fingerprints.tolist(), df["id"].tolist()),
+    )
+
+
+def backfill_merchants(cursor: sqlite3.Cursor) -> None:
+    """Derive the merchant column for rows loaded before it existed."""
+    cursor.execute("SELECT id, description_1, description_2 FROM transactions")
+    rows = cursor.fetchall()
+    if not rows:
+        return
+
+    df = pd.DataFrame([tuple(row) for row in rows], columns=["id", "description_1", "description_2"])
+    merchants = normalize_merchants(df["description_1"], df["description_2"])
+
+    cursor.executemany(
+        "UPDATE transactions SET merchant = ? WHERE id = ?",
+        zip(merchants.tolist(), df["id"].tolist()),
+    )
+
+
+def sync_indexes(cursor: sqlite3.Cursor) -> None:
+    """Create missing TRANSACTION_INDEXES and rebuild any that have drifted."""
+    cursor.execute(
+        """
+        SELECT name FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = 'transactions' AND name LIKE 'idx_transactions_%'
+        """
+    )
+    existing = [row[0] for row in cursor.fetchall()]
+
+    current = set()
+    for name in existing:
+        cursor.execute(f"PRAGMA index_info({name})")
+        # Rows are (seqno, cid, name); seqno is the position in the index
+        columns = tuple(row[2] for row in sorted(cursor.fetchall(), key=lambda row: row[0]))
+        if TRANSACTION_INDEXES.get(name) == columns:
+            current.add(name)
+        else:
+            cursor.execute(f"DROP INDEX {name}")
+
+    missing = [name for name in TRANSACTION_INDEXES if name not in current]
+    for name in missing:
+        columns = ", ".join(TRANSACTION_INDEXES[name])
+        cursor.execute(f"CREATE INDEX {name} ON transactions ({columns})")
+
+    if missing:
+        analyze_transactions(cursor)
+
+
+def drop_transaction_indexes(cursor: sqlite3.Cursor) -> None:
+    """Drop every secondary index; run_migrations puts them back.
+
+    Only meant for bulk loads into an emptied table, inside the load's
+    transaction, so other connections never see the table unindexed.
+    """
+    for name in [*TRANSACTION_INDEXES, FINGERPRINT_INDEX]:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def analyze_transactions(cursor: sqlite3.Cursor) -> None:
+    """Refresh the planner's statistics for the transactions table.
+
+    Without them SQLite assumes `amount_cents < 0` is highly selective and
+    picks the amount index for date-sorted pages, then sorts every debit in
+    a temp b-tree. A sampled ANALYZE is enough to steer it to the date index.
+    """
+    cursor.execute("PRAGMA analysis_limit = 1000")
+    cursor.execute("ANALYZE transactions")
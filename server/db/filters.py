@@ -0,0 +1,74 @@
+import re
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from db.categories import CATEGORY_CODES
+from models.enums import Category, TransactionType
+
+# 'YYYY-MM-DD' to the Julian day number stored in transactions.day
+DAY_OF = "CAST(julianday(?) + 0.5 AS INTEGER)"
+
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def check_date(value: str, name: str) -> str:
+    """`value` if it's a real YYYY-MM-DD date, else a 400.
+
+    julianday() gives NULL for anything else ("2024-01", "2024-1-5"), which
+    would silently match no rows and come back as a 404.
+    """
+    try:
+        if ISO_DATE.fullmatch(value):
+            datetime.strptime(value, "%Y-%m-%d")
+            return value
+    except ValueError:
+        pass
+    raise HTTPException(status_code=400, detail=f"Invalid {name} '{value}': expected YYYY-MM-DD")
+
+
+def build_filters(
+    category: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    transaction_type: TransactionType,
+    account: Optional[int] = None,
+    amount_column: str = "amount_cents",
+) -> Tuple[str, list]:
+    """WHERE clause and params shared by every endpoint that filters transactions.
+
+    Kept in one place so /transactions, /categories, the export and the
+    insights endpoints always agree on what "the current filters" select.
+    Works on the integer columns, which the indexes are built on, and which
+    daily_totals shares; `amount_column` lets db/rollups.py use its sign
+    column in place of amount_cents.
+    """
+    conditions: List[str] = []
+    params: list = []
+
+    if account is not None:
+        conditions.append("account_id = ?")
+        params.append(account)
+
+    if category and category != Category.ALL:
+        conditions.append("category_code = ?")
+        # 0 is no category's code, so an unknown name still matches nothing
+        params.append(CATEGORY_CODES.get(category, 0))
+
+    if start_date:
+        conditions.append(f"day >= {DAY_OF}")
+        params.append(check_date(start_date, "start_date"))
+
+    if end_date:
+        # day is 0 for dates that didn't parse, which no range should include
+        conditions.append(f"day <= {DAY_OF} AND day > 0")
+        params.append(check_date(end_date, "end_date"))
+
+    if transaction_type == TransactionType.DEBIT:
+        conditions.append(f"{amount_column} < 0")
+    elif transaction_type == TransactionType.CREDIT:
+        conditions.append(f"{amount_column} > 0")
+    # If "all", no condition is added
+
+    return (" AND ".join(conditions) if conditions else "1=1"), params
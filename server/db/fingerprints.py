@@ -0,0 +1,109 @@
+import hashlib
+import sqlite3
+from typing import Optional
+
+import orjson
+import pandas as pd
+
+# What makes two rows "the same transaction" across statement downloads.
+# Category and is_reimbursed are deliberately left out: they're the fields a
+# user edits, and an edit must not make the row look new on the next import.
+FINGERPRINT_COLUMNS = [
+    "account_type",
+    "account_number",
+    "transaction_date",
+    "cad_amount",
+    "description_1",
+    "description_2",
+]
+
+SEPARATOR = "\x1f"
+
+
+def _text(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[column].fillna("").astype(str).str.strip()
+
+
+def _amount(df: pd.DataFrame) -> pd.Series:
+    # Formatted rather than str()'d so -5.5 from the CSV and -5.50 read back
+    # from SQLite produce the same key
+    amounts = pd.to_numeric(df["cad_amount"], errors="coerce")
+    text = pd.Series("", index=df.index)
+    present = amounts.notna()
+    text[present] = amounts[present].map("{:.2f}".format)
+    return text
+
+
+class SeenKeys:
+    """How often each fingerprint key has occurred so far in one import.
+
+    Counted in a scratch table rather than a dict: every distinct row of the
+    file needs an entry, which for a multi-million-row file is more memory
+    than the rest of the import put together, and SQLite keeps only its page
+    cache of it in memory. Created and dropped inside the import's own
+    transaction, so no other connection ever sees it.
+    """
+
+    TABLE = "import_seen_keys"
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self.cursor = cursor
+        cursor.execute(f"DROP TABLE IF EXISTS {self.TABLE}")
+        # Keyed by the key's 64-bit hash, to keep entries small
+        cursor.execute(f"CREATE TABLE {self.TABLE} (key_hash INTEGER PRIMARY KEY, count INTEGER NOT NULL)")
+
+    def count(self, key_hashes: pd.Series) -> pd.Series:
+        """Earlier occurrences of each row's key, then count this chunk's."""
+        counts = key_hashes.value_counts()
+        self.cursor.execute(
+            f"""
+            SELECT chunk.value, seen.count
+            FROM json_each(?) AS chunk JOIN {self.TABLE} AS seen ON seen.key_hash = chunk.value
+            """,
+            (orjson.dumps(counts.index.tolist()),),
+        )
+        earlier = dict(self.cursor.fetchall())
+
+        # WHERE true tells the parser the ON CONFLICT is an upsert, not a join
+        self.cursor.execute(
+            f"""
+            INSERT INTO {self.TABLE} (key_hash, count)
+            SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?) WHERE true
+            ON CONFLICT (key_hash) DO UPDATE SET count = count + excluded.count
+            """,
+            (orjson.dumps(list(zip(counts.index.tolist(), counts.tolist()))),),
+        )
+        return key_hashes.map(earlier).fillna(0).astype(int)
+
+    def drop(self) -> None:
+        self.cursor.execute(f"DROP TABLE {self.TABLE}")
+
+
+def transaction_fingerprints(df: pd.DataFrame, seen_keys: Optional[SeenKeys] = None) -> pd.Series:
+    """Stable identity for each row of `df` (which uses the DB column names).
+
+    Two genuinely separate purchases can share every field (two coffees on
+    the same day), so each key also carries its occurrence number within
+    `df`. Re-importing an overlapping statement then reproduces the same
+    fingerprints, while a second identical purchase still gets its own.
+
+    When `df` is one chunk of a larger file, pass the same `seen_keys` for
+    every chunk, so numbering continues where the previous chunk stopped.
+    """
+    key = _text(df, "account_type")
+    for column in FINGERPRINT_COLUMNS[1:]:
+        values = _amount(df) if column == "cad_amount" else _text(df, column)
+        key = key + SEPARATOR + values
+
+    occurrence = key.groupby(key).cumcount()
+
+    if seen_keys is not None:
+        # As signed integers, which is what SQLite stores
+        key_hashes = pd.util.hash_pandas_object(key, index=False).astype("int64")
+        occurrence += seen_keys.count(key_hashes)
+
+    return (key + SEPARATOR + occurrence.astype(str)).map(
+        lambda text: hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    )
@@ -1,8 +1,18 @@
 import sqlite3
 import pandas as pd
 from datetime import datetime
+from typing import Callable, NamedTuple, Optional, Set
 
-from core.config import DB_PATH
+from core.config import CSV_CHUNK_ROWS
+from db.accounts import account_ids, prune_accounts
+from db.categories import FALLBACK_CODE, LABEL_CODES
+from db.database import analyze_transactions, drop_transaction_indexes, run_migrations
+from db.fingerprints import SeenKeys, transaction_fingerprints
+from db.merchants import normalize_merchants
+from db.rollups import create_rollups, drop_rollup_triggers, rebuild_daily_totals
+from db.search import create_search_index, drop_search_triggers, rebuild_search_index
+from db.version import data_version
+from models.enums import ImportMode
 
 
 def normalize_date(date_str):
@@ -22,6 +32,61 @@ def normalize_date(date_str):
             return str(date_str)  # Keep as-is if it can't parse
 
 
+DATE_FORMATS = [
+    "%m/%d/%Y",  # RBC format
+    "%Y-%m-%d",  # Already normalized, e.g. a file exported from /export-csv
+]
+
+
+def normalize_dates(values: pd.Series) -> pd.Series:
+    """Vectorized normalize_date for a whole column.
+
+    Each format is tried once over every still-unparsed row with
+    pd.to_datetime, which is far faster than two strptime calls per row.
+    normalize_date only runs on the few rows neither format matched, so
+    edge cases (out-of-range years, odd spacing) come out exactly as before.
+    """
+    result = pd.Series(None, index=values.index, dtype=object)
+
+    present = values.notna()
+    text = values[present].astype(str)
+
+    for date_format in DATE_FORMATS:
+        if text.empty:
+            break
+        parsed = pd.to_datetime(text, format=date_format, errors="coerce")
+        matched = parsed.notna()
+        result[text.index[matched]] = parsed[matched].dt.strftime("%Y-%m-%d")
+        text = text[~matched]
+
+    if not text.empty:
+        result[text.index] = text.map(normalize_date)
+
+    # Missing dates stay None, as normalize_date returns for them
+    return result.where(result.notna(), None)
+
+
+# Julian day number of 1970-01-01, where pandas counts days from
+UNIX_EPOCH_DAY = 2440588
+
+
+def date_days(dates: pd.Series) -> pd.Series:
+    """Julian day numbers for normalize_dates output; 0 where it isn't a date."""
+    parsed = pd.to_datetime(dates, format="%Y-%m-%d", errors="coerce")
+    days = (parsed - pd.Timestamp(0)).dt.days + UNIX_EPOCH_DAY
+    return days.fillna(0).astype("int64")
+
+
+def to_cents(amounts: pd.Series) -> pd.Series:
+    """Whole cents, None where the amount is missing or not a number."""
+    return (pd.to_numeric(amounts, errors="coerce") * 100).round().astype("Int64")
+
+
+def category_codes(labels: pd.Series) -> pd.Series:
+    """Codes for a Category column; see LABEL_CODES and FALLBACK_CODE."""
+    return labels.astype("string").str.strip().map(LABEL_CODES).fillna(FALLBACK_CODE).astype("int64")
+
+
 TRUTHY_VALUES = {"true", "t", "yes", "y", "1"}
 FALSY_VALUES = {"false", "f", "no", "n", "0", ""}
 
@@ -53,64 +118,205 @@ def parse_reimbursed(value) -> int:
         return 0
 
 
-def load_csv_to_db(csv_path: str) -> int:
-    df = pd.read_csv(csv_path)
+def parse_reimbursed_column(values: pd.Series) -> pd.Series:
+    """Vectorized parse_reimbursed for a whole column.
+
+    The recognized spellings are matched with one isin per set; anything
+    else falls back to parse_reimbursed so the per-row semantics hold.
+    """
+    # A column of only true/false is already parsed to bool by read_csv
+    if pd.api.types.is_bool_dtype(values):
+        return values.astype(int)
+
+    result = pd.Series(0, index=values.index, dtype=int)
+
+    present = values.notna()
+    text = values[present].astype(str).str.strip().str.lower()
+
+    truthy = text.isin(TRUTHY_VALUES)
+    result[text.index[truthy]] = 1
+
+    unrecognized = ~truthy & ~text.isin(FALSY_VALUES)
+    if unrecognized.any():
+        result[text.index[unrecognized]] = values[text.index[unrecognized]].map(parse_reimbursed)
+
+    return result
+
+
+class LoadResult(NamedTuple):
+    rows: int
+    """Transactions in the file."""
+    inserted: int
+    skipped: int
+    """Rows already in the database (append mode only)."""
+
+
+# Identifiers, not numbers: read as text so account numbers keep their
+# leading zeros and fingerprint the same way whether they come from a CSV
+# or back out of SQLite
+TEXT_COLUMNS = {"Account Type": str, "Account Number": str, "Cheque Number": str}
 
-    required_columns = [
-        "Account Type",
-        "Account Number",
-        "Transaction Date",
-        "Description 1",
-        "CAD$",
-        "Category"
-    ]
 
-    missing = [col for col in required_columns if col not in df.columns]
+REQUIRED_COLUMNS = [
+    "Account Type",
+    "Account Number",
+    "Transaction Date",
+    "Description 1",
+    "CAD$",
+    "Category"
+]
+
+COLUMN_NAMES = {
+    "Account Type": "account_type",
+    "Account Number": "account_number",
+    "Transaction Date": "transaction_date",
+    "Cheque Number": "cheque_number",
+    "Description 1": "description_1",
+    "Description 2": "description_2",
+    "CAD$": "cad_amount",
+    "USD$": "usd_amount",
+    "Category": "category",
+    "Is Reimbursed": "is_reimbursed",
+}
+
+
+def validate_header(csv_path: str) -> None:
+    """Fail fast on a file that isn't an RBC export, reading only its header."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+
+    missing = [col for col in REQUIRED_COLUMNS if col not in header]
     if missing:
         raise ValueError(f"Missing required columns: {missing}")
 
+
+def prepare_chunk(chunk: pd.DataFrame, seen_keys: SeenKeys) -> pd.DataFrame:
+    """Turn a slice of the CSV into rows ready for the transactions table."""
     # Normalize transaction dates to YYYY-MM-DD format
-    df['Transaction Date'] = df['Transaction Date'].apply(normalize_date)
+    chunk["Transaction Date"] = normalize_dates(chunk["Transaction Date"])
 
     # Optional column: plain RBC exports predate it, so default those to false
-    if "Is Reimbursed" in df.columns:
-        df["Is Reimbursed"] = df["Is Reimbursed"].apply(parse_reimbursed)
+    if "Is Reimbursed" in chunk.columns:
+        chunk["Is Reimbursed"] = parse_reimbursed_column(chunk["Is Reimbursed"])
     else:
-        df["Is Reimbursed"] = 0
-
-    df = df.rename(columns={
-        "Account Type": "account_type",
-        "Account Number": "account_number",
-        "Transaction Date": "transaction_date",
-        "Cheque Number": "cheque_number",
-        "Description 1": "description_1",
-        "Description 2": "description_2",
-        "CAD$": "cad_amount",
-        "USD$": "usd_amount",
-        "Category": "category",
-        "Is Reimbursed": "is_reimbursed",
-    })
-
-    columns_to_keep = [
-        "account_type",
-        "account_number",
-        "transaction_date",
-        "cheque_number",
-        "description_1",
-        "description_2",
-        "cad_amount",
-        "usd_amount",
-        "category",
-        "is_reimbursed",
-    ]
-
-    df = df[[col for col in columns_to_keep if col in df.columns]]
-
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("DELETE FROM transactions")
-    df.to_sql("transactions", conn, if_exists="append", index=False)
-
-    row_count = len(df)
-    conn.close()
-
-    return row_count
+        chunk["Is Reimbursed"] = 0
+
+    chunk = chunk.rename(columns=COLUMN_NAMES)
+    chunk = chunk[[column for column in COLUMN_NAMES.values() if column in chunk.columns]]
+    chunk["fingerprint"] = transaction_fingerprints(chunk, seen_keys)
+    chunk["merchant"] = normalize_merchants(
+        chunk["description_1"], chunk["description_2"] if "description_2" in chunk.columns else None
+    )
+
+    # Into the columns transactions actually stores (see create_transactions_sql)
+    chunk["day"] = date_days(chunk["transaction_date"])
+    chunk["unparsed_date"] = chunk["transaction_date"].where(chunk["day"] == 0)
+    chunk["amount_cents"] = to_cents(chunk["cad_amount"])
+    if "usd_amount" in chunk.columns:
+        chunk["usd_cents"] = to_cents(chunk["usd_amount"])
+    chunk["category_code"] = category_codes(chunk["category"])
+    return chunk.drop(columns=["transaction_date", "cad_amount", "usd_amount", "category"], errors="ignore")
+
+
+def load_csv_to_db(
+    csv_path: str,
+    conn: sqlite3.Connection,
+    mode: ImportMode = ImportMode.REPLACE,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> LoadResult:
+    """Load an RBC-format CSV into the transactions table.
+
+    REPLACE swaps the whole table for the file's contents. REPLACE_ACCOUNTS
+    does the same for just the accounts in the file, leaving every other
+    account as it was, so each card's export can be reloaded on its own.
+    APPEND keeps what's there, including category and reimbursed edits, and
+    inserts only rows whose fingerprint isn't already stored, so loading a
+    new month's statement costs only its new transactions.
+
+    The file is read CSV_CHUNK_ROWS rows at a time, so memory stays flat
+    however large it is. `on_progress` is called with the running row count
+    after each chunk is written.
+    """
+    validate_header(csv_path)
+
+    # REPLACE_ACCOUNTS: accounts whose old rows are already cleared
+    replaced: Set[int] = set()
+    rows = 0
+    inserted = 0
+
+    # One transaction for the whole load: readers never see a half-loaded
+    # table, and a bad row leaves the previous data untouched
+    with conn:
+        # Explicitly, since sqlite3 only opens one on its own before the
+        # first INSERT/UPDATE/DELETE: the trigger and index drops below
+        # would otherwise commit straight away, and outlive a failed load
+        conn.execute("BEGIN")
+        cursor = conn.cursor()
+
+        # The only state carried between chunks: how often each fingerprint
+        # key has been seen, so duplicates split across chunks still number
+        # apart
+        seen_keys = SeenKeys(cursor)
+
+        # daily_totals is rebuilt in one pass at the end rather than
+        # updated by a trigger for every inserted (or deleted) row
+        drop_rollup_triggers(cursor)
+
+        if mode == ImportMode.REPLACE:
+            # Same for the search index, which 'rebuild' then fills in one
+            # pass. Other modes keep its triggers: re-tokenizing every stored
+            # description would cost far more than indexing the file's rows.
+            drop_search_triggers(cursor)
+            conn.execute("DELETE FROM transactions")
+            # Filling an unindexed table and indexing once at the end is far
+            # cheaper than updating every b-tree row by row
+            drop_transaction_indexes(cursor)
+
+        verb = "INSERT OR IGNORE" if mode == ImportMode.APPEND else "INSERT"
+
+        for chunk in pd.read_csv(csv_path, dtype=TEXT_COLUMNS, chunksize=CSV_CHUNK_ROWS):
+            chunk = prepare_chunk(chunk, seen_keys)
+            chunk["account_id"] = account_ids(cursor, chunk["account_type"], chunk["account_number"])
+
+            if mode == ImportMode.REPLACE_ACCOUNTS:
+                # Cleared the first time the file mentions an account. Still
+                # one transaction, so no reader sees an account half-replaced.
+                for account_id in set(chunk["account_id"].tolist()) - replaced:
+                    cursor.execute("DELETE FROM transactions WHERE account_id = ?", (account_id,))
+                    replaced.add(account_id)
+
+            # sqlite3 can't bind NaN as NULL or numpy ints, so hand it plain objects
+            records = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+            placeholders = ", ".join("?" for _ in chunk.columns)
+
+            cursor.executemany(
+                f"{verb} INTO transactions ({', '.join(chunk.columns)}) VALUES ({placeholders})",
+                records,
+            )
+            # rowcount, not total_changes: the latter also counts the rows
+            # the search triggers write
+            inserted += cursor.rowcount
+            rows += len(chunk)
+
+            if on_progress:
+                on_progress(rows)
+
+        if mode == ImportMode.REPLACE:
+            # Recreates the dropped indexes, which refreshes the statistics
+            run_migrations(cursor)
+            # After, so each check is a lookup on the account index
+            prune_accounts(cursor)
+        else:
+            analyze_transactions(cursor)
+
+        seen_keys.drop()
+        rebuild_daily_totals(cursor)
+        create_rollups(cursor)
+
+        if mode == ImportMode.REPLACE:
+            rebuild_search_index(cursor)
+            create_search_index(cursor)
+
+    # After the commit, so nothing cached from here on predates the load
+    data_version.bump()
+
+    return LoadResult(rows=rows, inserted=inserted, skipped=rows - inserted)
@@ -0,0 +1,152 @@
+import re
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Card-network and payment-processor tags in front of the real merchant name
+# ("SQ *BLUE DOOR CAFE", "TST* LOCAL TAVERN", "PAYPAL *STEAM")
+PROCESSOR_PREFIX = re.compile(r"^(?:SQ|TST|PAYPAL|PP|SP|IC|DD|WPY|ZTL)\s*\*\s*")
+
+# Everything that differs between two visits to the same merchant: store
+# numbers (#1234), masked card suffixes (****1234), order references after a
+# '*' (AMZN MKTP CA*2K3JF8AB1) and any word carrying a run of 3+ digits
+REFERENCE_NOISE = re.compile(r"#\s*\d+|\*+\s*\S*|\b\w*\d{3,}\w*\b")
+
+# A trailing province code, as card terminals append after the city
+PROVINCE_SUFFIX = re.compile(r"\s+(?:AB|BC|MB|NB|NL|NS|NT|NU|ON|PE|QC|SK|YT)$")
+
+SEPARATORS = re.compile(r"[\s,]+")
+TRAILING_PUNCTUATION = re.compile(r"[\s\-.,/]+$")
+
+# Abbreviations terminals print for merchants that also appear spelled out.
+# Matched on whole leading words, longest first, so "AMZN MKTP" wins over
+# "AMZN" and "AMAZON PRIME" is left alone.
+MERCHANT_ALIASES = {
+    "AMZN MKTP CA": "AMAZON",
+    "AMZN MKTP": "AMAZON",
+    "AMZN": "AMAZON",
+    "AMAZON.CA": "AMAZON",
+    "AMAZON.COM": "AMAZON",
+    "TIM HORTON'S": "TIM HORTONS",
+    "TIMHORTONS": "TIM HORTONS",
+    "MCDONALD'S": "MCDONALDS",
+    "SHOPPERS DRUG MAR": "SHOPPERS DRUG MART",
+    "UBER* TRIP": "UBER TRIP",
+    "UBER *TRIP": "UBER TRIP",
+    "UBEREATS": "UBER EATS",
+    "NETFLIX.COM": "NETFLIX",
+    "SPOTIFY P": "SPOTIFY",
+}
+
+# Descriptions that name the kind of payment rather than who was paid. For
+# these the counterparty is in Description 2 (the e-Transfer recipient,
+# the biller), so that becomes the merchant instead.
+GENERIC_DESCRIPTIONS = {
+    "E-TRANSFER",
+    "E-TRANSFER SENT",
+    "E-TRANSFER RECEIVED",
+    "INTERAC E-TRANSFER",
+    "ONLINE BANKING PAYMENT",
+    "ONLINE BANKING TRANSFER",
+    "ONLINE TRANSFER",
+    "BILL PAYMENT",
+    "MISC PAYMENT",
+    "PAYMENT",
+    "PAYROLL DEPOSIT",
+    "DEPOSIT",
+}
+
+
+def _build_alias_trie(aliases: Dict[str, str]) -> dict:
+    """Nest the alias keys word by word; a node's None key holds its canonical name."""
+    trie: dict = {}
+    for alias, canonical in aliases.items():
+        node = trie
+        for word in alias.split():
+            node = node.setdefault(word, {})
+        node[None] = canonical
+    return trie
+
+
+ALIAS_TRIE = _build_alias_trie(MERCHANT_ALIASES)
+
+
+def _apply_aliases(words: List[str]) -> List[str]:
+    node = ALIAS_TRIE
+    match = None
+    for depth, word in enumerate(words, start=1):
+        node = node.get(word)
+        if node is None:
+            break
+        if None in node:
+            match = (depth, node[None])
+
+    if match is None:
+        return words
+    depth, canonical = match
+    return canonical.split() + words[depth:]
+
+
+def _clean(description) -> str:
+    if description is None or pd.isna(description):
+        return ""
+
+    text = str(description).upper().strip()
+    text = PROCESSOR_PREFIX.sub("", text)
+    text = _apply_aliases(SEPARATORS.split(text.strip()))
+    text = REFERENCE_NOISE.sub(" ", " ".join(text))
+    text = SEPARATORS.sub(" ", text).strip()
+
+    without_province = PROVINCE_SUFFIX.sub("", text)
+    if without_province:
+        text = without_province
+
+    return TRAILING_PUNCTUATION.sub("", text)
+
+
+def normalize_merchant(description_1, description_2=None) -> Optional[str]:
+    """Canonical merchant for a transaction, or None if nothing's left.
+
+    "STARBUCKS #1234" and "Starbucks #5678 ON" both become "STARBUCKS". A
+    city is kept ("STARBUCKS TORONTO"), since it can't be told apart from
+    the end of a merchant's name.
+    """
+    merchant = _clean(description_1)
+
+    if merchant in GENERIC_DESCRIPTIONS:
+        counterparty = _clean(description_2)
+        if counterparty:
+            merchant = f"{merchant} {counterparty}"
+
+    return merchant or None
+
+
+def _clean_column(descriptions: pd.Series) -> pd.Series:
+    """_clean once per distinct value, broadcast back to every row."""
+    codes, uniques = pd.factorize(descriptions)
+    # factorize gives missing values code -1, which picks this trailing ""
+    cleaned = pd.Series([_clean(value) for value in uniques] + [""], dtype=object)
+    result = cleaned.take(codes)
+    result.index = descriptions.index
+    return result
+
+
+def normalize_merchants(description_1: pd.Series, description_2: Optional[pd.Series] = None) -> pd.Series:
+    """normalize_merchant for whole columns.
+
+    Statements repeat the same few hundred merchants over and over, so each
+    distinct description is cleaned once and the result broadcast back,
+    rather than running the regexes per row.
+    """
+    merchants = _clean_column(description_1)
+
+    if description_2 is not None:
+        generic = merchants.isin(GENERIC_DESCRIPTIONS)
+        if generic.any():
+            counterparties = _clean_column(description_2[generic])
+            has_counterparty = counterparties != ""
+            merchants[counterparties.index[has_counterparty]] = (
+                merchants[generic][has_counterparty] + " " + counterparties[has_counterparty]
+            )
+
+    return merchants.where(merchants != "", None)
@@ -0,0 +1,102 @@
+import re
+import sqlite3
+import time
+from functools import lru_cache
+from typing import Callable, Optional
+
+from core.config import SQL_PROGRESS_STEPS
+from core.metrics import current_profile
+
+SQL_COMMENT = re.compile(r"--[^\n]*")
+
+
+@lru_cache(maxsize=1024)
+def statement_label(sql: str) -> str:
+    """A statement as one line, comments dropped, for use as a metric label.
+
+    The routes build their SQL from a handful of filter combinations with
+    the values bound as parameters, so this stays a short list.
+    """
+    return " ".join(SQL_COMMENT.sub(" ", sql).split())
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Charges each statement's time, rows and VM steps to the request
+    being served (core/metrics.py). Outside a request it's a plain cursor.
+
+    Time spent in fetches counts towards the statement that produced the
+    rows, since that's where SQLite does most of a query's work. Rows are
+    only counted through fetchone/fetchmany/fetchall, which is all the
+    routes use.
+    """
+
+    _statement: Optional[str] = None
+
+    def _profiled(self, method: Callable, *args, executions: int = 0, rows: Optional[Callable] = None):
+        profile = current_profile.get()
+        if profile is None or self._statement is None:
+            return method(*args)
+
+        steps = self.connection.vm_steps
+        start = time.perf_counter()
+        result = method(*args)
+        seconds = time.perf_counter() - start
+
+        profile.record(
+            self._statement,
+            seconds,
+            int(rows(result)) if rows else 0,
+            self.connection.vm_steps - steps,
+            executions,
+        )
+        return result
+
+    def execute(self, sql, parameters=()):
+        self._statement = statement_label(sql)
+        return self._profiled(super().execute, sql, parameters, executions=1)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._statement = statement_label(sql)
+        return self._profiled(super().executemany, sql, seq_of_parameters, executions=1)
+
+    def fetchone(self):
+        return self._profiled(super().fetchone, rows=lambda row: row is not None)
+
+    def fetchmany(self, size=None):
+        return self._profiled(super().fetchmany, self.arraysize if size is None else size, rows=len)
+
+    def fetchall(self):
+        return self._profiled(super().fetchall, rows=len)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Pool connection handing out ProfiledCursors.
+
+    SQLite's progress handler counts VM instructions as they run. Unlike
+    wall time, that count doesn't move with machine load, so a query that
+    starts doing more work as the history grows shows up plainly.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.vm_steps = 0
+        self.set_progress_handler(self._count_steps, SQL_PROGRESS_STEPS)
+
+    def _count_steps(self) -> int:
+        self.vm_steps += SQL_PROGRESS_STEPS
+        # Non-zero would abort the running statement
+        return 0
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    # The C versions of these open a plain cursor of their own, bypassing
+    # cursor() above, and the loaders, rollups and search index use them
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
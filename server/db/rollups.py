@@ -0,0 +1,133 @@
+import sqlite3
+from typing import Optional, Tuple
+
+from db.filters import build_filters
+from models.enums import TransactionType
+
+# Per-day totals behind /categories, the /transactions count and total, and
+# /insights/monthly. A day holds at most a few dozen (account, category,
+# sign, reimbursed) combinations, so these queries read one row per
+# combination per day in range instead of every transaction.
+#
+# Keyed like transactions itself: `day` is the Julian day number (0 when the
+# date didn't parse), account_id is from db/accounts.py and category_code is
+# from db/categories.py. `sign` is
+# sign(amount_cents): -1 debit, 1 credit, 0 for zero or missing. Totals are
+# whole cents, so summing any number of days is exact.
+CREATE_DAILY_TOTALS = """
+    CREATE TABLE IF NOT EXISTS daily_totals (
+        day INTEGER NOT NULL,
+        account_id INTEGER NOT NULL,
+        category_code INTEGER NOT NULL,
+        sign INTEGER NOT NULL,
+        is_reimbursed INTEGER NOT NULL,
+        transaction_count INTEGER NOT NULL,
+        total_cents INTEGER NOT NULL,
+        PRIMARY KEY (day, account_id, category_code, sign, is_reimbursed)
+    ) WITHOUT ROWID
+"""
+
+# The rollup key of a transactions row, given the trigger's NEW or OLD alias
+_KEY_COLUMNS = "day, account_id, category_code, sign, is_reimbursed"
+
+
+def _key_values(row: str) -> str:
+    return f"{row}.day, {row}.account_id, {row}.category_code, COALESCE(sign({row}.amount_cents), 0), {row}.is_reimbursed"
+
+
+def _key_match(row: str) -> str:
+    return (
+        f"day = {row}.day "
+        f"AND account_id = {row}.account_id "
+        f"AND category_code = {row}.category_code "
+        f"AND sign = COALESCE(sign({row}.amount_cents), 0) "
+        f"AND is_reimbursed = {row}.is_reimbursed"
+    )
+
+
+def _add(row: str) -> str:
+    return f"""
+        INSERT INTO daily_totals ({_KEY_COLUMNS}, transaction_count, total_cents)
+        VALUES ({_key_values(row)}, 1, COALESCE({row}.amount_cents, 0))
+        ON CONFLICT ({_KEY_COLUMNS}) DO UPDATE
+        SET transaction_count = transaction_count + 1, total_cents = total_cents + excluded.total_cents;
+    """
+
+
+def _remove(row: str) -> str:
+    return f"""
+        UPDATE daily_totals
+        SET transaction_count = transaction_count - 1,
+            total_cents = total_cents - COALESCE({row}.amount_cents, 0)
+        WHERE {_key_match(row)};
+        DELETE FROM daily_totals WHERE {_key_match(row)} AND transaction_count = 0;
+    """
+
+
+# Keep daily_totals in step with single-row writes (the PATCH endpoints).
+# CSV loads drop these and rebuild the table once at the end instead.
+ROLLUP_TRIGGERS = {
+    "trg_daily_totals_insert": f"""
+        AFTER INSERT ON transactions BEGIN {_add("NEW")} END
+    """,
+    "trg_daily_totals_delete": f"""
+        AFTER DELETE ON transactions BEGIN {_remove("OLD")} END
+    """,
+    "trg_daily_totals_update": f"""
+        AFTER UPDATE OF day, account_id, category_code, amount_cents, is_reimbursed ON transactions
+        BEGIN {_remove("OLD")} {_add("NEW")} END
+    """,
+}
+
+
+def create_rollups(cursor: sqlite3.Cursor) -> None:
+    """Create daily_totals and its triggers if missing, filling a new table."""
+    cursor.execute("PRAGMA table_info(daily_totals)")
+    columns = {row[1] for row in cursor.fetchall()}
+    if columns and "account_id" not in columns:
+        # Laid out for an older transactions table
+        cursor.execute("DROP TABLE daily_totals")
+    is_new = "account_id" not in columns
+
+    cursor.execute(CREATE_DAILY_TOTALS)
+    if is_new:
+        rebuild_daily_totals(cursor)
+
+    for name, body in ROLLUP_TRIGGERS.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_rollup_triggers(cursor: sqlite3.Cursor) -> None:
+    """For bulk loads: rebuild_daily_totals once beats a trigger per row."""
+    for name in ROLLUP_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuild_daily_totals(cursor: sqlite3.Cursor) -> None:
+    cursor.execute("DELETE FROM daily_totals")
+    cursor.execute(
+        f"""
+        INSERT INTO daily_totals ({_KEY_COLUMNS}, transaction_count, total_cents)
+        SELECT day,
+               account_id,
+               category_code,
+               COALESCE(sign(amount_cents), 0),
+               is_reimbursed,
+               COUNT(*),
+               COALESCE(SUM(amount_cents), 0)
+        FROM transactions
+        GROUP BY 1, 2, 3, 4, 5
+        """
+    )
+
+
+def rollup_filters(
+    category: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    transaction_type: TransactionType,
+    account: Optional[int] = None,
+) -> Tuple[str, list]:
+    """build_filters for daily_totals, selecting the same rows it would on
+    transactions, so totals come out the same from either table."""
+    return build_filters(category, start_date, end_date, transaction_type, account, amount_column="sign")
@@ -0,0 +1,106 @@
+import re
+import sqlite3
+from typing import Optional, Tuple
+
+# Full-text index over both description columns, behind /transactions?q=.
+# External content: the text itself stays in transactions and only the index
+# lives here, kept in step with it by the triggers below.
+#
+# unicode61 with remove_diacritics folds case and accents ("Café" finds
+# "CAFE"), and the 2- and 3-character prefix indexes keep short type-ahead
+# queries like "ti*" from scanning every term that starts with them.
+CREATE_TRANSACTIONS_FTS = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        description_1,
+        description_2,
+        content = 'transactions',
+        content_rowid = 'id',
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+"""
+
+# bm25 with Description 1 (the merchant) weighted over Description 2, which
+# is mostly references and e-Transfer memos
+SEARCH_RANK = "bm25(2.0, 1.0)"
+
+_INDEX_NEW = """
+    INSERT INTO transactions_fts (rowid, description_1, description_2)
+    VALUES (NEW.id, NEW.description_1, NEW.description_2);
+"""
+
+_UNINDEX_OLD = """
+    INSERT INTO transactions_fts (transactions_fts, rowid, description_1, description_2)
+    VALUES ('delete', OLD.id, OLD.description_1, OLD.description_2);
+"""
+
+SEARCH_TRIGGERS = {
+    "trg_transactions_fts_insert": f"""
+        AFTER INSERT ON transactions BEGIN {_INDEX_NEW} END
+    """,
+    "trg_transactions_fts_delete": f"""
+        AFTER DELETE ON transactions BEGIN {_UNINDEX_OLD} END
+    """,
+    "trg_transactions_fts_update": f"""
+        AFTER UPDATE OF description_1, description_2 ON transactions
+        BEGIN {_UNINDEX_OLD} {_INDEX_NEW} END
+    """,
+}
+
+# What the tokenizer would split a query into; anything else (quotes,
+# operators, '*') is dropped so user input can't form FTS5 syntax
+SEARCH_TERMS = re.compile(r"\w+")
+
+
+def create_search_index(cursor: sqlite3.Cursor) -> None:
+    """Create transactions_fts and its triggers if missing, filling a new index."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'")
+    is_new = cursor.fetchone() is None
+
+    cursor.execute(CREATE_TRANSACTIONS_FTS)
+    if is_new:
+        cursor.execute(
+            "INSERT INTO transactions_fts (transactions_fts, rank) VALUES ('rank', ?)", (SEARCH_RANK,)
+        )
+        rebuild_search_index(cursor)
+
+    for name, body in SEARCH_TRIGGERS.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_search_triggers(cursor: sqlite3.Cursor) -> None:
+    """For replace loads, which re-index the whole table once at the end."""
+    for name in SEARCH_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuild_search_index(cursor: sqlite3.Cursor) -> None:
+    cursor.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+
+
+def match_expression(q: Optional[str]) -> Optional[str]:
+    """FTS5 query for free text: every word must match, each as a prefix.
+
+    "tim hort" becomes '"tim"* "hort"*', which finds TIM HORTONS #123.
+    None if there's nothing to search for.
+    """
+    terms = SEARCH_TERMS.findall(q or "")
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_join(expression: str) -> Tuple[str, list]:
+    """JOIN restricting transactions to matches, with their rank as search.rank.
+
+    Lower rank is more relevant. Other filters still apply to the
+    transactions columns as usual.
+    """
+    return (
+        """
+        JOIN (
+            SELECT rowid, rank FROM transactions_fts WHERE transactions_fts MATCH ?
+        ) AS search ON search.rowid = transactions.id
+        """,
+        [expression],
+    )
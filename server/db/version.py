@@ -0,0 +1,27 @@
+import threading
+import uuid
+
+
+class DataVersion:
+    """Counter bumped after every committed write to the transactions table.
+
+    Cached responses and ETags are keyed on it, so a write makes every
+    earlier entry unreachable at once instead of tracking which responses
+    it affected. The boot id keeps a counter restarted at 0 from reissuing
+    an ETag that a client got for different data before the restart.
+    """
+
+    def __init__(self):
+        self.boot_id = uuid.uuid4().hex[:8]
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def current(self) -> str:
+        return f"{self.boot_id}.{self._version}"
+
+    def bump(self) -> None:
+        with self._lock:
+            self._version += 1
+
+
+data_version = DataVersion()
@@ -2,14 +2,25 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+from core.cache import ResponseCacheMiddleware
+from core.compression import CompressionMiddleware
+from core.metrics import MetricsMiddleware
 from core.lifespan import lifespan
-from api.routes import transactions, categories, export_csv, load_csv
+from api.routes import accounts, transactions, categories, export_csv, insights, load_csv, metrics
 
 app = FastAPI(
     title="RBC Transaction API",
     lifespan=lifespan
 )
 
+# Added first so it sits inside CORS, and cached replies and 304s still get
+# CORS headers on the way out
+app.add_middleware(ResponseCacheMiddleware)
+
+# Outside the cache, which then holds uncompressed bodies and serves any
+# Accept-Encoding from the same entry
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -17,13 +28,20 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
     # Without this, CORS hides the header and the export can't read the filename
-    expose_headers=["Content-Disposition"],
+    expose_headers=["Content-Disposition", "ETag"],
 )
 
+# Outermost, so its timings include every layer above and its byte counts
+# are the compressed bodies actually sent
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(transactions.router)
 app.include_router(categories.router)
+app.include_router(accounts.router)
 app.include_router(load_csv.router)
 app.include_router(export_csv.router)
+app.include_router(insights.router)
+app.include_router(metrics.router)
 
 
 @app.get("/")
@@ -32,11 +50,18 @@ async def root():
         "message": "RBC Transaction API",
         "endpoints": {
             "/transactions": "Get paginated transactions by category",
+            "/transactions/bulk": "Set category or reimbursed on many transactions at once (PATCH)",
             "/categories": "List all categories with counts and totals",
+            "/accounts": "List the accounts loaded, with ids for the account filter",
             "/transactions/export": "Download the filtered transactions as a CSV",
-            "/load-csv": "Load a CSV file from a server-side path into the database",
-            "/upload-csv": "Upload a CSV file from the browser into the database",
-            "/export-csv": "Export the database into a CSV file"
+            "/load-csv": "Queue a CSV file from a server-side path for loading",
+            "/upload-csv": "Upload a CSV file from the browser and queue it for loading",
+            "/jobs/{job_id}": "Progress and outcome of a queued CSV load",
+            "/export-csv": "Export the database into a CSV file",
+            "/insights/monthly": "Monthly totals per category, split by reimbursed status",
+            "/insights/merchants": "Top merchants by spend or number of transactions",
+            "/insights/recurring": "Subscriptions and other charges repeating on a regular cycle",
+            "/metrics": "Request latency, response sizes and SQL timings in Prometheus format"
         }
     }
 
@@ -6,6 +6,8 @@ from pydantic import BaseModel
 class SortBy(str, Enum):
     DATE = "date"
     AMOUNT = "amount"
+    # Best search matches first; only with a q= search
+    RELEVANCE = "relevance"
 
 
 class SortOrder(str, Enum):
@@ -13,6 +15,37 @@ class SortOrder(str, Enum):
     DESCENDING = "desc"
 
 
+class ImportMode(str, Enum):
+    REPLACE = "replace"
+    APPEND = "append"
+    # Replace only the accounts that appear in the file
+    REPLACE_ACCOUNTS = "replace_accounts"
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class PaginationMode(str, Enum):
+    OFFSET = "offset"
+    CURSOR = "cursor"
+
+
+class ResponseFormat(str, Enum):
+    JSON = "json"
+    COLUMNAR = "columnar"
+    MSGPACK = "msgpack"
+    ARROW = "arrow"
+
+
+class MerchantRanking(str, Enum):
+    SPEND = "spend"
+    FREQUENCY = "frequency"
+
+
 class TransactionType(str, Enum):
     DEBIT = "debit"
     CREDIT = "credit"
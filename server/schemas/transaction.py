@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from typing import List, Optional
 
-from models.enums import CategoryOut
+from models.enums import Category, CategoryOut, TransactionType
 
 
 class Transaction(BaseModel):
@@ -21,3 +21,25 @@ class Transaction(BaseModel):
 class PaginatedResponse(BaseModel):
     data: List[Transaction]
     metadata: dict
+
+
+class BulkFilter(BaseModel):
+    """Selects transactions the way the list filters do, plus text matches."""
+    category: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    transaction_type: TransactionType = TransactionType.ALL
+    # An accounts.id, as listed by /accounts
+    account: Optional[int] = None
+    # Case-insensitive substring of Description 1 or Description 2
+    description: Optional[str] = None
+    # Exact normalized merchant, as returned by /insights/merchants
+    merchant: Optional[str] = None
+
+
+class BulkUpdate(BaseModel):
+    """Target either explicit `ids` or a `filter`, and set at least one field."""
+    ids: Optional[List[int]] = None
+    filter: Optional[BulkFilter] = None
+    category: Optional[Category] = None
+    is_reimbursed: Optional[bool] = None
@@ -1,8 +1,19 @@
 import anthropic
 import pandas as pd
 import json
+import re
+import sqlite3
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+# Run as `python scripts/rbc_categorizer.py`, so server/ isn't on the path yet
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db.merchants import normalize_merchants
+
 # Standard spending categories
 CATEGORIES = [
     "Groceries",
@@ -21,6 +32,189 @@ CATEGORIES = [
 ]
 
 BATCH_SIZE = 50  # Process 50 descriptions at a time
+CONCURRENCY = 4  # Batches in flight at once
+MAX_RETRIES = 4  # Attempts per batch after the first one fails
+RETRY_BASE_DELAY = 1.0  # Seconds; doubles after each failed attempt
+
+# Merchants already categorized on earlier runs, so a new month's statement
+# only pays for the ones never seen before
+CACHE_PATH = "data/category_cache.db"
+
+# The server's database. Its rows, including categories fixed by hand in the
+# app, are what the local categorizer learns from.
+DB_PATH = "data/transactions.db"
+
+# How sure the local categorizer must be before its answer is used instead of
+# asking the API
+LOCAL_CONFIDENCE = 0.9
+
+# The database stores the short category names the API routes use
+# (models/enums.py); this script works in the longer labels above
+DB_CATEGORY_LABELS = {
+    "Restaurants": "Restaurants & Dining",
+    "Shopping": "Shopping & Retail",
+    "Utilities": "Bills & Utilities",
+}
+
+# Errors that won't go away by asking again
+NON_RETRYABLE_ERRORS = (
+    anthropic.AuthenticationError,
+    anthropic.PermissionDeniedError,
+    anthropic.BadRequestError,
+    anthropic.NotFoundError,
+)
+
+TOKEN = re.compile(r"[A-Z][A-Z0-9&'.-]+")
+
+
+def merchant_tokens(merchant):
+    return set(TOKEN.findall(merchant))
+
+
+class LocalCategorizer:
+    """Categorizes merchants offline from what's already in the database.
+
+    Two levels, most certain first:
+      - a merchant already in the transactions table takes its usual
+        category there, when nearly all of its rows agree;
+      - otherwise each of its words is looked up in an index of the known
+        merchants containing that word ("PETRO-CANADA 12 ST" shares
+        PETRO-CANADA with known gas stations). The most telling word
+        decides, unless another confident word points elsewhere.
+    Everything below LOCAL_CONFIDENCE is left for the API.
+    """
+
+    # Added to a word's merchant count when scoring it, so a word seen in a
+    # single known merchant scores 1 / 1.1 rather than a flat 1.0
+    TOKEN_SMOOTHING = 0.1
+
+    def __init__(self, merchant_counts, confidence=LOCAL_CONFIDENCE):
+        """`merchant_counts` maps (merchant, category label) to a row count."""
+        self.confidence = confidence
+
+        by_merchant = defaultdict(Counter)
+        for (merchant, category), count in merchant_counts.items():
+            by_merchant[merchant][category] += count
+
+        # Merchant -> (most common category, share of its rows)
+        self.known = {}
+        for merchant, counts in by_merchant.items():
+            category, count = counts.most_common(1)[0]
+            self.known[merchant] = (category, count / sum(counts.values()))
+
+        # Word -> category -> number of known merchants containing it. One
+        # vote per merchant, not per transaction, so a coffee shop visited
+        # daily doesn't outweigh everything else sharing its words.
+        self.token_index = defaultdict(Counter)
+        for merchant, (category, _) in self.known.items():
+            for token in merchant_tokens(merchant):
+                self.token_index[token][category] += 1
+
+    @classmethod
+    def from_database(cls, db_path=DB_PATH, confidence=LOCAL_CONFIDENCE):
+        """Train on the server's transactions table; empty if there isn't one."""
+        if not Path(db_path).exists():
+            return cls({}, confidence)
+
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(
+                """
+                SELECT merchant, category, COUNT(*)
+                FROM transactions
+                WHERE merchant IS NOT NULL AND category IS NOT NULL
+                GROUP BY merchant, category
+                """
+            ).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        finally:
+            conn.close()
+
+        merchant_counts = Counter()
+        for merchant, category, count in rows:
+            label = DB_CATEGORY_LABELS.get(category, category)
+            if label in CATEGORIES:
+                merchant_counts[merchant, label] += count
+        return cls(merchant_counts, confidence)
+
+    def predict(self, merchant):
+        """(category, confidence) for a normalized merchant, or (None, 0.0)."""
+        if merchant in self.known:
+            return self.known[merchant]
+
+        # Per word: its usual category and how consistently, so generic
+        # words ("PAYMENT", "TORONTO") spread across categories score low
+        votes = []
+        for token in merchant_tokens(merchant):
+            counts = self.token_index.get(token)
+            if counts:
+                category, count = counts.most_common(1)[0]
+                votes.append((count / (sum(counts.values()) + self.TOKEN_SMOOTHING), category))
+        if not votes:
+            return None, 0.0
+
+        votes.sort(reverse=True)
+        confidence, category = votes[0]
+        # "LOBLAWS PHARMACY" could be either; let the API decide
+        for other_confidence, other_category in votes[1:]:
+            if other_category != category:
+                confidence -= other_confidence
+                break
+        return category, max(confidence, 0.0)
+
+    def categorize(self, merchants):
+        """The confident subset of `merchants`, as merchant -> category."""
+        categorized = {}
+        for merchant in merchants:
+            category, confidence = self.predict(merchant)
+            if category is not None and confidence >= self.confidence:
+                categorized[merchant] = category
+        return categorized
+
+
+class CategoryCache:
+    """Normalized merchant -> category, persisted in a small SQLite file."""
+
+    def __init__(self, path=CACHE_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS merchant_categories (
+                merchant TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.conn.commit()
+
+    def get_many(self, merchants):
+        found = {}
+        merchants = list(merchants)
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(merchants), 500):
+            chunk = merchants[i:i + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = self.conn.execute(
+                f"SELECT merchant, category FROM merchant_categories WHERE merchant IN ({placeholders})",
+                chunk,
+            )
+            found.update(rows)
+        return found
+
+    def put_many(self, categories):
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO merchant_categories (merchant, category) VALUES (?, ?)
+                ON CONFLICT(merchant) DO UPDATE
+                SET category = excluded.category, updated_at = CURRENT_TIMESTAMP
+                """,
+                categories.items(),
+            )
+
+    def close(self):
+        self.conn.close()
 
 
 def categorize_batch(descriptions, client):
@@ -56,58 +250,128 @@ Be consistent - similar merchants should get the same category."""
     elif '```' in response_text:
         response_text = response_text.split('```')[1].split('```')[0].strip()
 
-    # Parse JSON
+    # Parse JSON; a malformed reply raises, so the batch gets retried
     try:
         return json.loads(response_text)
     except json.JSONDecodeError as e:
         print(f"Failed to parse JSON: {e}")
         print(f"Response: {response_text[:500]}")
-        # Return empty dict on error
-        return {}
+        raise
+
 
+def categorize_batch_with_retry(descriptions, client, max_retries=MAX_RETRIES):
+    """categorize_batch, retried with exponential backoff on transient errors.
 
-def categorize_transactions(csv_path, api_key, output_path=None):
+    Gives up with an empty result rather than raising, so one bad batch
+    leaves its descriptions as 'Other' instead of losing the whole run.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return categorize_batch(descriptions, client)
+        except NON_RETRYABLE_ERRORS:
+            raise
+        except Exception as e:
+            if attempt == max_retries:
+                print(f"Giving up on a batch of {len(descriptions)} after {attempt + 1} attempts: {e}")
+                return {}
+            delay = RETRY_BASE_DELAY * 2 ** attempt
+            print(f"Batch failed ({e}), retrying in {delay:.0f}s...")
+            time.sleep(delay)
+
+
+def categorize_transactions(
+    csv_path,
+    api_key=None,
+    output_path=None,
+    client=None,
+    cache_path=CACHE_PATH,
+    concurrency=CONCURRENCY,
+    db_path=DB_PATH,
+):
     """
     Categorize RBC transactions using AI.
 
     Args:
         csv_path: Path to RBC CSV export
-        api_key: Anthropic API key
+        api_key: Anthropic API key (unused when `client` is given)
         output_path: Optional path for output CSV (defaults to input_categorized.csv)
+        client: Optional stand-in for anthropic.Anthropic, anything with a
+            compatible `messages.create`
+        cache_path: SQLite file remembering merchants from earlier runs, or
+            None to skip the cache
+        concurrency: Batches sent to the API at the same time
+        db_path: Server database the local categorizer learns from, or None
+            to send everything not in the cache to the API
     """
-    # Read the CSV
-    df = pd.read_csv(csv_path)
+    # Read the CSV. Descriptions as text, so a column of reference numbers
+    # isn't parsed to ints that no longer match the API's string keys.
+    df = pd.read_csv(csv_path, dtype={'Description 1': str, 'Description 2': str})
 
     # Validate required columns
     if 'Description 1' not in df.columns:
         raise ValueError("CSV must contain 'Description 1' column")
 
-    # Initialize Anthropic client
-    client = anthropic.Anthropic(api_key=api_key)
-
-    # Get unique descriptions
-    unique_descriptions = df['Description 1'].dropna().unique().tolist()
-    total_descriptions = len(unique_descriptions)
-
-    print(f"Found {total_descriptions} unique transaction descriptions to categorize...")
-
-    # Process in batches
-    categorization_map = {}
-
-    for i in range(0, total_descriptions, BATCH_SIZE):
-        batch = unique_descriptions[i:i + BATCH_SIZE]
-        batch_num = (i // BATCH_SIZE) + 1
-        total_batches = (total_descriptions + BATCH_SIZE - 1) // BATCH_SIZE
-
-        print(f"Processing batch {batch_num}/{total_batches} ({len(batch)} descriptions)...")
+    # Initialize Anthropic client. Retries are handled per batch below, with
+    # backoff, so the SDK's own are turned off to avoid retrying twice.
+    if client is None:
+        client = anthropic.Anthropic(api_key=api_key, max_retries=0)
+
+    # One entry per merchant: the same store under different store numbers
+    # is only categorized once, using the first description seen for it.
+    # Normalized as the server does for transactions.merchant, so merchants
+    # line up with what the local categorizer learned from.
+    merchants = normalize_merchants(df['Description 1'], df.get('Description 2'))
+    # Descriptions that are nothing but reference numbers normalize to
+    # None; those are keyed on the description as written, rather than
+    # never being asked about and ending up as 'Other'
+    merchants = merchants.fillna(df['Description 1'])
+    representatives = (
+        pd.DataFrame({'merchant': merchants, 'description': df['Description 1']})
+        .dropna()
+        .drop_duplicates('merchant')
+    )
+    print(f"Found {len(representatives)} unique merchants...")
 
-        batch_results = categorize_batch(batch, client)
-        categorization_map.update(batch_results)
+    # The database goes first: it holds the user's own corrections, which
+    # should win over whatever the API said about a merchant last time
+    merchant_categories = {}
+    if db_path:
+        local = LocalCategorizer.from_database(db_path)
+        merchant_categories = local.categorize(representatives['merchant'])
+        print(f"{len(merchant_categories)} categorized locally from {db_path}")
 
-    print(f"\nSuccessfully categorized {len(categorization_map)} descriptions")
+    cache = CategoryCache(cache_path) if cache_path else None
+    try:
+        if cache:
+            remaining = representatives['merchant'][~representatives['merchant'].isin(merchant_categories.keys())]
+            cached = cache.get_many(remaining)
+            if cached:
+                print(f"{len(cached)} already categorized in {cache_path}")
+            merchant_categories.update(cached)
+
+        uncached = representatives[~representatives['merchant'].isin(merchant_categories.keys())]
+        new_categories = categorize_descriptions(
+            uncached['description'].tolist(), client, concurrency
+        )
+
+        # Only answers from the category list are remembered; anything else
+        # falls to 'Other' below and gets another chance on the next run
+        learned = {
+            merchant: new_categories[description]
+            for merchant, description in zip(uncached['merchant'], uncached['description'])
+            if new_categories.get(description) in CATEGORIES
+        }
+        if cache and learned:
+            cache.put_many(learned)
+        merchant_categories.update(learned)
+    finally:
+        if cache:
+            cache.close()
+
+    print(f"\nSuccessfully categorized {len(merchant_categories)} merchants")
 
     # Apply categories to dataframe
-    df['Category'] = df['Description 1'].map(categorization_map)
+    df['Category'] = merchants.map(merchant_categories)
 
     # Handle any unmapped descriptions
     unmapped = df[df['Category'].isna()]['Description 1'].unique()
@@ -131,15 +395,51 @@ def categorize_transactions(csv_path, api_key, output_path=None):
     return df
 
 
-if __name__ == "__main__":
-    import sys
+def categorize_descriptions(descriptions, client, concurrency=CONCURRENCY):
+    """Send `descriptions` to the API in batches, `concurrency` at a time."""
+    batches = [descriptions[i:i + BATCH_SIZE] for i in range(0, len(descriptions), BATCH_SIZE)]
+    categorization_map = {}
+    if not batches:
+        return categorization_map
 
-    if len(sys.argv) < 3:
-        print("Usage: python rbc_categorizer.py <csv_path> <anthropic_api_key> [output_path]")
-        sys.exit(1)
+    print(f"Categorizing {len(descriptions)} new descriptions in {len(batches)} batches...")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(categorize_batch_with_retry, batch, client)
+            for batch in batches
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            categorization_map.update(future.result())
+            print(f"Finished batch {done}/{len(batches)}")
+
+    return categorization_map
 
-    csv_path = sys.argv[1]
-    api_key = sys.argv[2]
-    output_path = sys.argv[3] if len(sys.argv) > 3 else None
 
-    categorize_transactions(csv_path, api_key, output_path)
\ No newline at end of file
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Add a Category column to an RBC CSV export.")
+    parser.add_argument("csv_path")
+    parser.add_argument("api_key")
+    parser.add_argument("output_path", nargs="?")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help="batches sent to the API at once")
+    parser.add_argument("--cache", default=CACHE_PATH,
+                        help="SQLite file of merchants categorized on earlier runs")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="categorize every merchant, ignoring and not updating the cache")
+    parser.add_argument("--db", default=DB_PATH,
+                        help="transactions database to learn known merchants from")
+    parser.add_argument("--no-local", action="store_true",
+                        help="don't categorize from the database; ask the API for every uncached merchant")
+    args = parser.parse_args()
+
+    categorize_transactions(
+        args.csv_path,
+        args.api_key,
+        args.output_path,
+        cache_path=None if args.no_cache else args.cache,
+        concurrency=args.concurrency,
+        db_path=None if args.no_local else args.db,
+    )
@@ -0,0 +1,53 @@
+import sqlite3
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.synthetic import write_synthetic_csv
+from db.database import init_db
+from db.version import data_version
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "transactions.db")
+    conn.row_factory = sqlite3.Row
+    init_db(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def synthetic_csv(tmp_path):
+    path = tmp_path / "synthetic.csv"
+    write_synthetic_csv(str(path), 500)
+    return str(path)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """The app, on an empty database of its own under tmp_path."""
+    from main import app
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    # The response cache is process-wide; a new version keeps another
+    # test's responses from being served for this database
+    data_version.bump()
+    with TestClient(app) as client:
+        yield client
+
+
+def load(client: TestClient, csv_path: str, mode: str = "replace") -> dict:
+    """Run a /load-csv job to the end."""
+    job_id = client.post("/load-csv", params={"csv_path": csv_path, "mode": mode}).json()["job_id"]
+    return wait_for_job(client, job_id)
+
+
+def wait_for_job(client: TestClient, job_id: str) -> dict:
+    while True:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from conftest import load
+
+
+def accounts(client) -> dict:
+    return {account["account_type"]: account for account in client.get("/accounts").json()["accounts"]}
+
+
+def test_replace_accounts_leaves_other_accounts_alone(client, synthetic_csv, tmp_path):
+    assert load(client, synthetic_csv)["status"] == "succeeded"
+    before = accounts(client)
+    visa = before["Visa"]["id"]
+
+    # An edit on an account the next file doesn't mention
+    edited = client.get("/transactions", params={"account": visa, "page_size": 1}).json()["data"][0]
+    assert client.patch(
+        f"/transactions/{edited['id']}/reimbursed", params={"is_reimbursed": True}
+    ).status_code == 200
+
+    # A fresh chequing statement, shorter than what was loaded for it
+    export = pd.read_csv(synthetic_csv, dtype=str)
+    chequing = export[export["Account Type"] == "Chequing"][::2]
+    statement = str(tmp_path / "chequing.csv")
+    chequing.to_csv(statement, index=False)
+
+    job = load(client, statement, mode="replace_accounts")
+
+    assert job["status"] == "succeeded"
+    assert job["rows"] == len(chequing)
+    after = accounts(client)
+    # Same ids, so an account filter the client holds still works
+    assert {kind: account["id"] for kind, account in after.items()} == {
+        kind: account["id"] for kind, account in before.items()
+    }
+    assert after["Chequing"]["transaction_count"] == len(chequing)
+    for kind in ("Savings", "Visa", "MasterCard"):
+        assert after[kind] == before[kind]
+
+    page = client.get("/transactions", params={"account": visa, "page_size": 1}).json()["data"][0]
+    assert page["id"] == edited["id"]
+    assert page["is_reimbursed"] is True
+
+    # The rollup followed the replacement too
+    categories = client.get(
+        "/categories", params={"account": after["Chequing"]["id"], "transaction_type": "all"}
+    ).json()["categories"]
+    assert categories[0]["transaction_count"] == len(chequing)
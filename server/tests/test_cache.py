@@ -0,0 +1,65 @@
+import pytest
+
+from conftest import load
+
+
+@pytest.fixture
+def loaded(client, synthetic_csv):
+    assert load(client, synthetic_csv)["status"] == "succeeded"
+    return client
+
+
+def test_unchanged_response_is_a_304(loaded):
+    first = loaded.get("/categories", params={"transaction_type": "all"})
+    etag = first.headers["etag"]
+
+    again = loaded.get("/categories", params={"transaction_type": "all"}, headers={"If-None-Match": etag})
+
+    assert again.status_code == 304
+    assert again.content == b""
+    # Compressed 200s carry the weak form; If-None-Match compares weakly
+    assert again.headers["etag"].removeprefix("W/") == etag.removeprefix("W/")
+
+
+def test_parameter_order_does_not_change_the_etag(loaded):
+    first = loaded.get("/transactions?category=Groceries&page_size=10")
+    second = loaded.get("/transactions?page_size=10&category=Groceries")
+
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.content == second.content
+
+
+def totals(client) -> tuple:
+    response = client.get("/categories", params={"transaction_type": "all"})
+    counts = {category["value"]: category["transaction_count"] for category in response.json()["categories"]}
+    return response.headers["etag"], counts
+
+
+def test_patch_invalidates_cached_responses(loaded):
+    etag, before = totals(loaded)
+    transaction = loaded.get("/transactions", params={"category": "Groceries", "page_size": 1}).json()["data"][0]
+
+    assert loaded.patch(
+        f"/transactions/{transaction['id']}/category", params={"category": "Travel"}
+    ).status_code == 200
+
+    response = loaded.get("/categories", params={"transaction_type": "all"}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    new_etag, after = totals(loaded)
+    assert new_etag != etag
+    assert after["Groceries"] == before["Groceries"] - 1
+    assert after["Travel"] == before["Travel"] + 1
+
+
+def test_import_invalidates_cached_responses(loaded, synthetic_csv):
+    etag, before = totals(loaded)
+
+    assert load(loaded, synthetic_csv, mode="append")["status"] == "succeeded"
+    assert loaded.get(
+        "/categories", params={"transaction_type": "all"}, headers={"If-None-Match": etag}
+    ).status_code == 200
+
+    # Nothing new in the file, so the totals are the same, under a new ETag
+    new_etag, after = totals(loaded)
+    assert new_etag != etag
+    assert after == before
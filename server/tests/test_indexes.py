@@ -0,0 +1,88 @@
+import re
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from benchmarks.synthetic import write_synthetic_csv
+from conftest import load
+from core.config import DB_PATH
+from db.database import ConnectionPool
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    """Every statement the app runs, with its parameters filled in."""
+    statements = []
+    connect = ConnectionPool._connect
+
+    def traced_connect(self):
+        conn = connect(self)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(ConnectionPool, "_connect", traced_connect)
+    return statements
+
+
+@pytest.fixture
+def loaded(statements, client, tmp_path):
+    csv_path = tmp_path / "plans.csv"
+    # Enough rows that ANALYZE's statistics favour the indexes as they
+    # would on a real history
+    write_synthetic_csv(str(csv_path), 5_000)
+    assert load(client, str(csv_path))["status"] == "succeeded"
+    return client
+
+
+def query_plans(client, statements, path: str, params: dict) -> list:
+    """The plan of each SELECT run to answer the request, one string each."""
+    statements.clear()
+    assert client.get(path, params=params).status_code == 200
+
+    plans = []
+    with sqlite3.connect(Path(DB_PATH).resolve()) as conn:
+        for statement in statements:
+            if statement.lstrip().upper().startswith("SELECT"):
+                plan = conn.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+                plans.append(" | ".join(row[3] for row in plan))
+    return plans
+
+
+# Each route's filters, and the index TRANSACTION_INDEXES built for them
+TRANSACTION_PLANS = [
+    ({"category": "Groceries"}, "idx_transactions_category_date"),
+    ({"category": "Groceries", "sort_by": "amount"}, "idx_transactions_category_amount"),
+    ({"transaction_type": "all"}, "idx_transactions_date"),
+    ({"transaction_type": "all", "start_date": "2024-01-01", "end_date": "2024-03-31"}, "idx_transactions_date"),
+    ({"account": 1}, "idx_transactions_account_date"),
+    ({"transaction_type": "all", "sort_by": "amount"}, "idx_transactions_amount"),
+]
+
+
+@pytest.mark.parametrize("pagination", ["offset", "cursor"])
+@pytest.mark.parametrize("params, index", TRANSACTION_PLANS)
+def test_transaction_pages_use_their_index(loaded, statements, params, index, pagination):
+    plans = query_plans(loaded, statements, "/transactions", {**params, "pagination": pagination})
+
+    page_plans = [plan for plan in plans if "daily_totals" not in plan]
+    assert page_plans and all(re.search(rf"INDEX {index}\b", plan) for plan in page_plans), plans
+    # Read in index order: no sort step on top
+    assert not any("TEMP B-TREE" in plan for plan in page_plans), plans
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/transactions", {"category": "Groceries", "start_date": "2024-01-01"}),
+    ("/categories", {}),
+    ("/categories", {"start_date": "2024-01-01", "end_date": "2024-12-31"}),
+    ("/categories", {"account": 1, "transaction_type": "all"}),
+])
+def test_totals_come_from_the_rollup(loaded, statements, path, params):
+    plans = query_plans(loaded, statements, path, params)
+
+    totals_plans = [plan for plan in plans if "daily_totals" in plan]
+    assert totals_plans, plans
+    assert not any("SCAN transactions" in plan or "SEARCH transactions" in plan for plan in totals_plans), plans
+    if "start_date" in params:
+        # A date range seeks on the rollup's leading day column
+        assert all("USING PRIMARY KEY (day>?" in plan for plan in totals_plans), plans
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from conftest import load
+
+
+@pytest.mark.parametrize("rank_by", ["spend", "frequency"])
+def test_top_merchants_with_only_blank_amounts(client, synthetic_csv, rank_by):
+    export = pd.read_csv(synthetic_csv, dtype=str)
+    export.loc[export["Description 1"].str.startswith("SPOTIFY"), "CAD$"] = None
+    export.to_csv(synthetic_csv, index=False)
+    assert load(client, synthetic_csv)["status"] == "succeeded"
+
+    response = client.get(
+        "/insights/merchants", params={"transaction_type": "all", "rank_by": rank_by, "limit": 100}
+    )
+
+    assert response.status_code == 200
+    spotify = [merchant for merchant in response.json()["merchants"] if merchant["merchant"].startswith("SPOTIFY")]
+    assert spotify and all(merchant["total"] == merchant["average"] == 0 for merchant in spotify)
+
+
+def expected_months(export: pd.DataFrame) -> list:
+    """/insights/monthly's buckets worked out from the file itself."""
+    dates = pd.to_datetime(export["Transaction Date"], format="%m/%d/%Y")
+    frame = pd.DataFrame({
+        "month": dates.dt.strftime("%Y-%m"),
+        "category": export["Category"],
+        "is_reimbursed": export["Is Reimbursed"] == "true",
+        "cents": (export["CAD$"].astype(float) * 100).round().astype(int),
+    })
+    totals = frame.groupby(["month", "category", "is_reimbursed"])["cents"].agg(["size", "sum"])
+    return sorted(
+        (month, category, is_reimbursed, count, total / 100)
+        for (month, category, is_reimbursed), (count, total) in totals.iterrows()
+    )
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"transaction_type": "all"},
+    {"category": "Groceries", "start_date": "2018-01-01", "end_date": "2019-06-30"},
+])
+def test_monthly_totals_match_the_file(client, synthetic_csv, params):
+    export = pd.read_csv(synthetic_csv, dtype=str)
+    export["Is Reimbursed"] = ["true" if i % 5 == 0 else "false" for i in range(len(export))]
+    export.to_csv(synthetic_csv, index=False)
+    assert load(client, synthetic_csv)["status"] == "succeeded"
+
+    response = client.get("/insights/monthly", params=params)
+
+    assert response.status_code == 200
+    rows = export
+    if params.get("transaction_type") != "all":
+        rows = rows[rows["CAD$"].astype(float) < 0]
+    if "category" in params:
+        rows = rows[rows["Category"] == params["category"]]
+    if "start_date" in params:
+        dates = pd.to_datetime(rows["Transaction Date"], format="%m/%d/%Y")
+        rows = rows[(dates >= params["start_date"]) & (dates <= params["end_date"])]
+
+    months = [
+        (bucket["month"], bucket["category"]["value"], bucket["is_reimbursed"],
+         bucket["transaction_count"], bucket["total"])
+        for bucket in response.json()["months"]
+    ]
+    assert months
+    # Both sides sum whole cents, so the totals match exactly
+    assert months == expected_months(rows)
@@ -0,0 +1,23 @@
+from pathlib import Path
+
+from conftest import wait_for_job
+
+
+def test_uploads_with_the_same_name_keep_their_own_files(client, synthetic_csv, tmp_path):
+    good = Path(synthetic_csv).read_bytes()
+    # Right header, but a row the loader can't parse
+    bad = good + b"x,y,z,1,2,3,4,5,6,7,8,9\n"
+
+    jobs = [
+        client.post("/upload-csv", files={"file": ("statement.csv", body, "text/csv")}).json()
+        for body in (good, bad)
+    ]
+    good_job, bad_job = (wait_for_job(client, job["job_id"]) for job in jobs)
+
+    assert good_job["status"] == "succeeded"
+    assert good_job["rows"] == len(good.splitlines()) - 1
+    assert bad_job["status"] == "failed"
+    assert good_job["filename"] == bad_job["filename"] == "statement.csv"
+
+    # Both uploads are cleaned up once their jobs end, loaded or not
+    assert list((tmp_path / "data").glob("statement_*.csv")) == []
@@ -0,0 +1,106 @@
+import pandas as pd
+import pytest
+
+from db.loaders import load_csv_to_db
+from db.rollups import ROLLUP_TRIGGERS
+from db.search import SEARCH_TRIGGERS
+from models.enums import ImportMode
+
+
+def triggers(conn) -> set:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+
+
+def malformed_copy(csv_path: str) -> str:
+    """The same export with one row carrying three extra fields."""
+    lines = open(csv_path).read().splitlines()
+    lines[-1] += ",x,y,z"
+    path = csv_path.replace(".csv", "_malformed.csv")
+    with open(path, "w") as file:
+        file.write("\n".join(lines) + "\n")
+    return path
+
+
+@pytest.mark.parametrize("mode", list(ImportMode))
+def test_failed_load_keeps_rollup_triggers(conn, synthetic_csv, mode):
+    load_csv_to_db(synthetic_csv, conn)
+
+    with pytest.raises(pd.errors.ParserError):
+        load_csv_to_db(malformed_copy(synthetic_csv), conn, mode)
+
+    assert set(ROLLUP_TRIGGERS) <= triggers(conn)
+
+    # And daily_totals still follows edits
+    code, count = conn.execute(
+        "SELECT category_code, COUNT(*) FROM transactions GROUP BY 1 ORDER BY 2 LIMIT 1"
+    ).fetchone()
+    conn.execute("UPDATE transactions SET category_code = ? WHERE category_code = ?", (code + 1, code))
+    conn.commit()
+    assert conn.execute(
+        "SELECT COALESCE(SUM(transaction_count), 0) FROM daily_totals WHERE category_code = ?", (code,)
+    ).fetchone()[0] == 0
+
+
+def test_failed_replace_keeps_search_index(conn, synthetic_csv):
+    load_csv_to_db(synthetic_csv, conn)
+
+    with pytest.raises(pd.errors.ParserError):
+        load_csv_to_db(malformed_copy(synthetic_csv), conn, ImportMode.REPLACE)
+
+    assert set(SEARCH_TRIGGERS) <= triggers(conn)
+
+    # Edits still reach transactions_fts
+    conn.execute("UPDATE transactions SET description_1 = 'ZEBRACAFE' WHERE id = 1")
+    conn.commit()
+    matches = conn.execute("SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH 'zebracafe'")
+    assert [row[0] for row in matches] == [1]
+
+
+def test_duplicates_split_across_chunks_number_apart(conn, synthetic_csv, tmp_path, monkeypatch):
+    # Every row twice, the copies far enough apart to land in other chunks
+    export = pd.read_csv(synthetic_csv, dtype=str)
+    doubled = str(tmp_path / "doubled.csv")
+    pd.concat([export, export]).to_csv(doubled, index=False)
+
+    load_csv_to_db(doubled, conn)
+    whole_file = {row[0] for row in conn.execute("SELECT fingerprint FROM transactions")}
+
+    monkeypatch.setattr("db.loaders.CSV_CHUNK_ROWS", 64)
+    load_csv_to_db(doubled, conn)
+    chunked = {row[0] for row in conn.execute("SELECT fingerprint FROM transactions")}
+
+    assert len(whole_file) == 2 * len(export)
+    assert chunked == whole_file
+    # The scratch table is gone with the import
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'import_seen_keys'").fetchall() == []
+
+
+def test_append_inserts_only_new_rows(conn, synthetic_csv, tmp_path):
+    export = pd.read_csv(synthetic_csv, dtype=str)
+    first_month = str(tmp_path / "first.csv")
+    export[:300].to_csv(first_month, index=False)
+    load_csv_to_db(first_month, conn)
+
+    # An edit made in the app between the two statements
+    conn.execute("UPDATE transactions SET category_code = 13, is_reimbursed = 1 WHERE id = 1")
+    conn.commit()
+
+    result = load_csv_to_db(synthetic_csv, conn, ImportMode.APPEND)
+
+    assert result == (len(export), len(export) - 300, 300)
+    assert conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == len(export)
+    assert tuple(conn.execute("SELECT category_code, is_reimbursed FROM transactions WHERE id = 1").fetchone()) == (13, 1)
+
+
+def test_append_keeps_repeated_rows_apart(conn, synthetic_csv, tmp_path):
+    # The same purchase twice on one day: two transactions, not a duplicate
+    export = pd.read_csv(synthetic_csv, dtype=str)
+    repeated = str(tmp_path / "repeated.csv")
+    pd.concat([export, export[:10]]).to_csv(repeated, index=False)
+
+    first = load_csv_to_db(repeated, conn, ImportMode.APPEND)
+    again = load_csv_to_db(repeated, conn, ImportMode.APPEND)
+
+    assert first == (len(export) + 10, len(export) + 10, 0)
+    assert again == (len(export) + 10, 0, len(export) + 10)
+    assert conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == len(export) + 10
@@ -0,0 +1,27 @@
+import sqlite3
+
+import pytest
+
+from core.metrics import RequestProfile, current_profile
+from db.profiling import ProfiledConnection
+
+
+@pytest.fixture
+def profile():
+    profile = RequestProfile()
+    token = current_profile.set(profile)
+    yield profile
+    current_profile.reset(token)
+
+
+def test_connection_execute_is_profiled(profile):
+    conn = sqlite3.connect(":memory:", factory=ProfiledConnection)
+
+    conn.execute("CREATE TABLE numbers (n INTEGER)")
+    conn.executemany("INSERT INTO numbers VALUES (?)", [(n,) for n in range(5)])
+    rows = conn.execute("SELECT n FROM numbers WHERE n > ?", (1,)).fetchall()
+
+    assert len(rows) == 3
+    stats = profile.statements["SELECT n FROM numbers WHERE n > ?"]
+    assert (stats.executions, stats.rows) == (1, 3)
+    assert profile.statements["INSERT INTO numbers VALUES (?)"].executions == 1
@@ -0,0 +1,104 @@
+import json
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from scripts import rbc_categorizer
+from scripts.rbc_categorizer import categorize_transactions
+
+
+class StubClient:
+    """Stands in for anthropic.Anthropic: answers from `categories`, failing
+    the first `failures` calls."""
+
+    def __init__(self, categories, failures=0):
+        self.categories = categories
+        self.failures = failures
+        self.batches = []
+        self.messages = self
+
+    def create(self, model, max_tokens, messages):
+        descriptions = json.loads(messages[0]["content"].split("categorize:\n", 1)[1].split("\n\nReturn", 1)[0])
+        self.batches.append(descriptions)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection reset")
+        reply = {description: self.categories[description] for description in descriptions}
+        return SimpleNamespace(content=[SimpleNamespace(text=json.dumps(reply))])
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(rbc_categorizer, "RETRY_BASE_DELAY", 0)
+
+
+@pytest.fixture
+def statement(tmp_path):
+    path = tmp_path / "statement.csv"
+    pd.DataFrame({
+        "Description 1": ["STARBUCKS #1234", "STARBUCKS #5678", "123456789", "LOBLAWS 1001"],
+        "CAD$": [-5.25, -4.75, -100.00, -62.10],
+    }).to_csv(path, index=False)
+    return path
+
+
+CATEGORIES = {
+    "STARBUCKS #1234": "Restaurants & Dining",
+    "123456789": "Transfers",
+    "LOBLAWS 1001": "Groceries",
+}
+
+
+def categorize(statement, tmp_path, client):
+    df = categorize_transactions(
+        str(statement),
+        output_path=str(tmp_path / "out.csv"),
+        client=client,
+        cache_path=str(tmp_path / "cache.db"),
+        db_path=None,
+    )
+    return df["Category"].tolist()
+
+
+def test_reference_only_descriptions_are_sent_to_the_api(statement, tmp_path):
+    client = StubClient(CATEGORIES)
+
+    categories = categorize(statement, tmp_path, client)
+
+    assert categories == ["Restaurants & Dining", "Restaurants & Dining", "Transfers", "Groceries"]
+    # One description per merchant, the all-digit one included as written
+    assert sorted(client.batches[0]) == ["123456789", "LOBLAWS 1001", "STARBUCKS #1234"]
+
+
+def test_second_run_is_answered_from_the_cache(statement, tmp_path):
+    first = categorize(statement, tmp_path, StubClient(CATEGORIES))
+
+    client = StubClient(CATEGORIES)
+    second = categorize(statement, tmp_path, client)
+
+    assert second == first
+    assert client.batches == []
+
+
+def test_failed_batches_are_retried(statement, tmp_path):
+    client = StubClient(CATEGORIES, failures=2)
+
+    categories = categorize(statement, tmp_path, client)
+
+    assert len(client.batches) == 3
+    assert categories == ["Restaurants & Dining", "Restaurants & Dining", "Transfers", "Groceries"]
+
+
+def test_batches_that_keep_failing_fall_back_to_other(statement, tmp_path):
+    client = StubClient(CATEGORIES, failures=rbc_categorizer.MAX_RETRIES + 1)
+
+    categories = categorize(statement, tmp_path, client)
+
+    assert len(client.batches) == rbc_categorizer.MAX_RETRIES + 1
+    assert categories == ["Other"] * 4
+
+    # Nothing was cached, so the next run asks again
+    client = StubClient(CATEGORIES)
+    assert categorize(statement, tmp_path, client)[0] == "Restaurants & Dining"
+    assert client.batches
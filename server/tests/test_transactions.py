@@ -0,0 +1,158 @@
+import pandas as pd
+import pytest
+
+from conftest import load
+from db.categories import CATEGORY_CODES, CODE_CATEGORIES
+
+
+@pytest.fixture
+def blank_amounts_csv(synthetic_csv):
+    """The synthetic export with CAD$ left blank on every tenth row."""
+    export = pd.read_csv(synthetic_csv, dtype=str)
+    export.loc[::10, "CAD$"] = None
+    export.to_csv(synthetic_csv, index=False)
+    return synthetic_csv
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_cursor_pages_include_rows_without_amount(client, blank_amounts_csv, sort_order):
+    assert load(client, blank_amounts_csv)["status"] == "succeeded"
+
+    params = {
+        "transaction_type": "all",
+        "sort_by": "amount",
+        "sort_order": sort_order,
+        "pagination": "cursor",
+        "page_size": 30,
+    }
+    response = client.get("/transactions", params=params)
+    total_items = response.json()["metadata"]["total_items"]
+
+    ids = []
+    while True:
+        assert response.status_code == 200, response.json()
+        page = response.json()
+        ids += [transaction["id"] for transaction in page["data"]]
+        if page["metadata"]["next_cursor"] is None:
+            break
+        response = client.get(
+            "/transactions", params={**params, "cursor": page["metadata"]["next_cursor"]}
+        )
+
+    assert len(ids) == len(set(ids)) == total_items
+
+    offset_ids = [
+        transaction["id"]
+        for transaction in client.get("/transactions", params={
+            "transaction_type": "all", "sort_by": "amount", "sort_order": sort_order, "page_size": total_items,
+        }).json()["data"]
+    ]
+    assert ids == offset_ids
+
+
+def test_columnar_category_codes_are_the_stored_codes(client, synthetic_csv):
+    assert load(client, synthetic_csv)["status"] == "succeeded"
+
+    params = {"transaction_type": "all", "page_size": 500}
+    page = client.get("/transactions", params={**params, "format": "columnar"}).json()
+    rows = client.get("/transactions", params=params).json()["data"]
+
+    assert [CATEGORY_CODES[row["category"]["value"]] for row in rows] == page["columns"]["category"]
+    for code, category in CODE_CATEGORIES.items():
+        assert page["categories"][code]["value"] == category.value
+
+
+@pytest.mark.parametrize("path", ["/transactions", "/categories", "/export-csv", "/insights/merchants"])
+@pytest.mark.parametrize("value", ["2024-01", "2024-1-05", "2024-02-30", "20240105", "yesterday"])
+def test_malformed_dates_are_rejected(client, path, value):
+    for name in ("start_date", "end_date"):
+        response = client.get(path, params={name: value})
+        assert response.status_code == 400
+        assert name in response.json()["detail"]
+
+
+def test_date_range_is_inclusive(client, synthetic_csv):
+    assert load(client, synthetic_csv)["status"] == "succeeded"
+    day = client.get("/transactions", params={"transaction_type": "all"}).json()["data"][0]["transaction_date"]
+
+    response = client.get("/transactions", params={"transaction_type": "all", "start_date": day, "end_date": day})
+
+    assert response.status_code == 200
+    assert {row["transaction_date"] for row in response.json()["data"]} == {day}
+
+
+
+def category_count(client, category: str, **params) -> int:
+    response = client.get("/transactions", params={"category": category, "transaction_type": "all", **params})
+    return response.json()["metadata"]["total_items"] if response.status_code == 200 else 0
+
+
+@pytest.mark.parametrize("bulk_filter", [{}, {"transaction_type": "all"}])
+def test_bulk_update_refuses_a_filter_matching_everything(client, synthetic_csv, bulk_filter):
+    assert load(client, synthetic_csv)["status"] == "succeeded"
+    before = category_count(client, "Travel")
+
+    response = client.patch("/transactions/bulk", json={"filter": bulk_filter, "category": "Travel"})
+
+    assert response.status_code == 400
+    assert category_count(client, "Travel") == before
+
+
+def test_bulk_update_by_filter_returns_the_rows_changed(client, synthetic_csv):
+    assert load(client, synthetic_csv)["status"] == "succeeded"
+    starbucks = category_count(client, "Restaurants", q="starbucks")
+    restaurants = category_count(client, "Restaurants")
+
+    response = client.patch("/transactions/bulk", json={
+        "filter": {"category": "Restaurants", "description": "starbucks"},
+        "category": "Other",
+        "is_reimbursed": True,
+    })
+
+    assert response.status_code == 200
+    assert response.json() == {"updated": starbucks}
+    assert starbucks > 0
+    assert category_count(client, "Restaurants") == restaurants - starbucks
+    assert category_count(client, "Restaurants", q="starbucks") == 0
+
+
+def test_bulk_update_by_ids_counts_each_row_once(client, synthetic_csv):
+    assert load(client, synthetic_csv)["status"] == "succeeded"
+    ids = [transaction["id"] for transaction in client.get(
+        "/transactions", params={"category": "Groceries", "page_size": 5}
+    ).json()["data"]]
+
+    response = client.patch("/transactions/bulk", json={"ids": ids + ids[:2] + [10_000_000], "is_reimbursed": True})
+
+    assert response.json() == {"updated": len(ids)}
+    page = client.get("/transactions", params={"category": "Groceries", "page_size": 5}).json()["data"]
+    assert all(transaction["is_reimbursed"] for transaction in page)
+
+
+@pytest.mark.parametrize("params, matches", [
+    # Prefix match on Description 1, within a category and date range
+    ({"q": "tim hort", "category": "Restaurants", "start_date": "2018-01-01", "end_date": "2020-12-31",
+      "transaction_type": "all"},
+     lambda export: export["Description 1"].str.startswith("TIM HORTONS") & (export["Category"] == "Restaurants")),
+    # Description 2, with the default debits-only filter
+    ({"q": "purchase", "category": "Groceries", "start_date": "2018-01-01", "end_date": "2020-12-31"},
+     lambda export: (export["Description 2"] == "POS PURCHASE") & (export["Category"] == "Groceries")
+     & (export["CAD$"].astype(float) < 0)),
+])
+@pytest.mark.parametrize("pagination", ["offset", "cursor"])
+def test_search_combines_with_filters(client, synthetic_csv, params, matches, pagination):
+    assert load(client, synthetic_csv)["status"] == "succeeded"
+    export = pd.read_csv(synthetic_csv, dtype=str, keep_default_na=False)
+    dates = pd.to_datetime(export["Transaction Date"], format="%m/%d/%Y")
+    expected = export[matches(export) & (dates >= params["start_date"]) & (dates <= params["end_date"])]
+
+    response = client.get(
+        "/transactions", params={**params, "pagination": pagination, "page_size": 1000, "include_totals": True}
+    )
+
+    assert len(expected) > 0
+    assert response.status_code == 200, response.json()
+    page = response.json()
+    assert sorted(transaction["cad_amount"] for transaction in page["data"]) == sorted(expected["CAD$"].astype(float))
+    assert page["metadata"]["total_items"] == len(expected)
+    assert page["metadata"]["category_total"] == round(expected["CAD$"].astype(float).sum(), 2)